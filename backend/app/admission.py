@@ -0,0 +1,236 @@
+"""Admission control in front of the database pool
+
+Each route class gets a concurrency limit, and all classes together share a
+global one sized to the pool, each with a short, bounded wait queue; when a
+queue is full (or the wait times out) the request is shed with a fast 503 +
+Retry-After instead of piling up on pool.acquire(). Slots are held until the
+response body has been sent, so streamed exports count for their whole
+duration. Expensive requests (search, large pages, export) also draw from a
+per-client token bucket and get 429 + Retry-After when it is empty.
+"""
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from .database import DB_POOL_MAX_SIZE
+from .metrics import Counter, Gauge, register
+
+# Requests in flight across all classes; more than the pool has connections would only queue on acquire()
+ADMISSION_GLOBAL_CONCURRENCY = int(os.getenv("ADMISSION_GLOBAL_CONCURRENCY", str(DB_POOL_MAX_SIZE)))
+# Per class, so one kind of request can't take every slot
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", str(max(1, DB_POOL_MAX_SIZE // 2))))
+ADMISSION_QUEUE = int(os.getenv("ADMISSION_QUEUE", "16"))
+# Longest a queued request waits for a slot before it is shed (seconds)
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "2"))
+
+# Per-client token bucket for expensive requests: refill per minute, burst size
+RATE_LIMIT_PER_MINUTE = float(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "20"))
+RATE_LIMIT_MAX_CLIENTS = 10000
+# Reverse proxies in front of the app that append to X-Forwarded-For (Render's
+# router is one); 0 ignores the header and keys on the socket peer
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+# /api/documents pages above this per_page count as expensive
+ADMISSION_LARGE_PAGE = int(os.getenv("ADMISSION_LARGE_PAGE", "200"))
+
+# Path prefix -> route class; paths not listed (health, metrics, admin, files) are not limited
+ROUTE_CLASSES = (
+    ("/api/search", "search"),
+    ("/api/export", "export"),
+    ("/api/documents", "documents"),
+    ("/api/people", "people"),
+    ("/api/stats", "stats"),
+    ("/api/suggest", "suggest"),
+)
+
+# Tokens an expensive request costs
+REQUEST_COST = {
+    "search": 1,
+    "documents": 1,
+    "export": 5,
+}
+
+ADMISSION_SHED = register(Counter(
+    "admission_shed_total", "Requests rejected by admission control",
+    ("route_class", "reason")
+))
+ADMISSION_ADMITTED = register(Counter(
+    "admission_admitted_total", "Requests admitted by admission control",
+    ("route_class",)
+))
+
+
+class ConcurrencyLimiter:
+    """Semaphore with a bounded, time-limited wait queue"""
+    
+    def __init__(self, limit: int, queue: int, timeout: float):
+        self.limit = limit
+        self.queue = queue
+        self.timeout = timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self._sem = asyncio.Semaphore(limit)
+    
+    async def acquire(self, timeout: Optional[float] = None) -> Optional[str]:
+        """None once admitted, otherwise the reason the request was shed"""
+        if self._sem.locked():
+            if self.waiting >= self.queue:
+                return "queue_full"
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._sem.acquire(), self.timeout if timeout is None else max(timeout, 0))
+            except asyncio.TimeoutError:
+                return "queue_timeout"
+            finally:
+                self.waiting -= 1
+        else:
+            await self._sem.acquire()
+        self.in_flight += 1
+        return None
+    
+    def release(self):
+        self.in_flight -= 1
+        self._sem.release()
+
+
+class TokenBuckets:
+    """Per-client token buckets, LRU-bounded"""
+    
+    def __init__(self, per_minute: float, burst: float, max_clients: int):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> (tokens, updated_at)
+    
+    def take(self, client: str, cost: float) -> float:
+        """Spend `cost` tokens; returns 0 if allowed, else seconds until enough tokens"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        elif self.rate > 0:
+            wait = (cost - tokens) / self.rate
+        else:
+            wait = 60.0
+        
+        self._buckets[client] = (tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+limiters = {
+    route_class: ConcurrencyLimiter(ADMISSION_CONCURRENCY, ADMISSION_QUEUE, ADMISSION_QUEUE_TIMEOUT)
+    for _, route_class in ROUTE_CLASSES
+}
+global_limiter = ConcurrencyLimiter(ADMISSION_GLOBAL_CONCURRENCY, ADMISSION_QUEUE, ADMISSION_QUEUE_TIMEOUT)
+client_buckets = TokenBuckets(RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, RATE_LIMIT_MAX_CLIENTS)
+
+
+def _limiter_values(attr: str) -> dict:
+    values = {(name,): getattr(l, attr) for name, l in limiters.items()}
+    values[("all",)] = getattr(global_limiter, attr)
+    return values
+
+register(Gauge("admission_in_flight", "Requests holding an admission slot (route_class=\"all\" is the global cap)",
+               lambda: _limiter_values("in_flight"), ("route_class",)))
+register(Gauge("admission_queued", "Requests waiting for an admission slot (route_class=\"all\" is the global cap)",
+               lambda: _limiter_values("waiting"), ("route_class",)))
+
+
+def route_class_for(path: str) -> Optional[str]:
+    for prefix, route_class in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return route_class
+    return None
+
+
+def client_key(request: Request) -> str:
+    """Address the nearest trusted proxy saw the request come from
+    
+    Clients can put anything in X-Forwarded-For, so only the hops our own
+    proxies appended (the rightmost TRUSTED_PROXY_HOPS) are believed
+    """
+    if TRUSTED_PROXY_HOPS > 0:
+        hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def _is_expensive(route_class: str, request: Request) -> bool:
+    if route_class in ("search", "export"):
+        return True
+    if route_class == "documents":
+        try:
+            return int(request.query_params.get("per_page", 0)) > ADMISSION_LARGE_PAGE
+        except ValueError:
+            return False
+    return False
+
+
+def _shed(status: int, detail: str, retry_after: float) -> JSONResponse:
+    return JSONResponse(
+        status_code=status,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+class AdmissionControl:
+    """ASGI middleware: per-client rate limits, then per-class and global concurrency limits
+    
+    Plain ASGI rather than @app.middleware("http"): there call_next returns as
+    soon as the headers are ready, which would free the slot while a
+    StreamingResponse body is still being sent
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        route_class = route_class_for(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        
+        request = Request(scope)
+        if _is_expensive(route_class, request):
+            wait = client_buckets.take(client_key(request), REQUEST_COST.get(route_class, 1))
+            if wait > 0:
+                ADMISSION_SHED.inc(1, route_class, "rate_limited")
+                await _shed(429, "Rate limit exceeded for expensive requests", wait)(scope, receive, send)
+                return
+        
+        limiter = limiters[route_class]
+        started = time.monotonic()
+        reason = await limiter.acquire()
+        if reason is None:
+            # One queue timeout covers both waits
+            reason = await global_limiter.acquire(ADMISSION_QUEUE_TIMEOUT - (time.monotonic() - started))
+            if reason is not None:
+                limiter.release()
+                reason = f"global_{reason}"
+        if reason is not None:
+            ADMISSION_SHED.inc(1, route_class, reason)
+            await _shed(503, "Server busy, retry shortly", ADMISSION_RETRY_AFTER)(scope, receive, send)
+            return
+        
+        ADMISSION_ADMITTED.inc(1, route_class)
+        try:
+            # Returns once the whole body has been sent (or the client went away)
+            await self.app(scope, receive, send)
+        finally:
+            global_limiter.release()
+            limiter.release()
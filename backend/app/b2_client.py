@@ -1,10 +1,15 @@
 """
 Cloud storage client (supports Backblaze B2 and Cloudflare R2)
 """
+import asyncio
 import os
+import time
 import boto3
 from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Optional
+from .metrics import STORAGE_CALL_SECONDS
 
 # Storage provider type (b2 or r2)
 STORAGE_TYPE = os.getenv("STORAGE_TYPE", "b2").lower()
@@ -47,8 +52,16 @@ else:
     S3_ENDPOINT = None
     PUBLIC_URL = None
 
+# Client tuning: boto3 clients are thread-safe, so one client is shared by a
+# bounded executor sized to its connection pool
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "16"))
+STORAGE_MAX_ATTEMPTS = int(os.getenv("STORAGE_MAX_ATTEMPTS", "5"))
+STORAGE_CONNECT_TIMEOUT = float(os.getenv("STORAGE_CONNECT_TIMEOUT", "5"))
+STORAGE_READ_TIMEOUT = float(os.getenv("STORAGE_READ_TIMEOUT", "30"))
+
 # Initialize S3-compatible client
 _storage_client = None
+_storage_executor = None
 
 def get_storage_client():
     """Get or create S3-compatible storage client (B2 or R2)"""
@@ -59,10 +72,35 @@ def get_storage_client():
             endpoint_url=S3_ENDPOINT,
             aws_access_key_id=ACCESS_KEY_ID,
             aws_secret_access_key=SECRET_ACCESS_KEY,
-            config=Config(signature_version='s3v4')
+            config=Config(
+                signature_version='s3v4',
+                max_pool_connections=STORAGE_MAX_CONNECTIONS,
+                retries={'max_attempts': STORAGE_MAX_ATTEMPTS, 'mode': 'standard'},
+                connect_timeout=STORAGE_CONNECT_TIMEOUT,
+                read_timeout=STORAGE_READ_TIMEOUT
+            )
         )
     return _storage_client
 
+def get_storage_executor() -> ThreadPoolExecutor:
+    """Bounded thread pool for blocking storage calls, one worker per pooled connection"""
+    global _storage_executor
+    if _storage_executor is None:
+        _storage_executor = ThreadPoolExecutor(max_workers=STORAGE_MAX_CONNECTIONS, thread_name_prefix="storage")
+    return _storage_executor
+
+def shutdown_storage_executor():
+    """Stop the storage executor (on app shutdown); queued calls are cancelled"""
+    global _storage_executor
+    if _storage_executor is not None:
+        _storage_executor.shutdown(wait=False, cancel_futures=True)
+        _storage_executor = None
+
+async def run_storage_call(func, *args, **kwargs):
+    """Run a blocking storage call on the storage executor without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_storage_executor(), partial(func, *args, **kwargs))
+
 def get_file_url(file_path: str) -> str:
     """
     Generate public URL for a file path
@@ -83,35 +121,76 @@ def get_file_url(file_path: str) -> str:
     # Construct public URL
     return f"{PUBLIC_URL.rstrip('/')}/{file_path}"
 
-def list_files(prefix: str = "", max_keys: int = 1000) -> list:
+def _list_page(client, kwargs: dict, page_size: int) -> dict:
+    started = time.perf_counter()
+    try:
+        return client.list_objects_v2(MaxKeys=page_size, **kwargs)
+    finally:
+        STORAGE_CALL_SECONDS.observe(time.perf_counter() - started, "list_objects_v2")
+
+class _ListingPager:
+    """Continuation-token paging state shared by list_files and list_files_async"""
+    
+    def __init__(self, prefix: str, max_keys: Optional[int]):
+        self.files = []
+        self.max_keys = max_keys
+        self.kwargs = {"Bucket": BUCKET_NAME, "Prefix": prefix}
+        self.done = False
+    
+    def next_page_size(self) -> Optional[int]:
+        """Keys to request next, or None once the listing is complete"""
+        if self.done:
+            return None
+        if self.max_keys is None:
+            return 1000
+        remaining = self.max_keys - len(self.files)
+        return min(1000, remaining) if remaining > 0 else None
+    
+    def add(self, response: dict):
+        for obj in response.get('Contents', []):
+            self.files.append(obj['Key'])
+        if response.get('IsTruncated'):
+            self.kwargs["ContinuationToken"] = response['NextContinuationToken']
+        else:
+            self.done = True
+
+def list_files(prefix: str = "", max_keys: Optional[int] = None) -> list:
     """
     List files from storage bucket with given prefix
     Returns list of file paths (relative to bucket root)
+    Pages through continuation tokens (the server returns at most 1000 keys
+    per call); max_keys caps the total, None lists everything
+    A failed page request raises instead of returning a partial listing
     Works with both B2 and R2
+    Blocking - use list_files_async from async code
     """
     client = get_storage_client()
     if not client or not BUCKET_NAME:
         return []
     
-    try:
-        response = client.list_objects_v2(
-            Bucket=BUCKET_NAME,
-            Prefix=prefix,
-            MaxKeys=max_keys
-        )
-        
-        files = []
-        for obj in response.get('Contents', []):
-            files.append(obj['Key'])
-        
-        return files
-    except Exception as e:
-        print(f"Error listing storage files: {e}")
+    pager = _ListingPager(prefix, max_keys)
+    while (page_size := pager.next_page_size()) is not None:
+        pager.add(_list_page(client, dict(pager.kwargs), page_size))
+    return pager.files
+
+async def list_files_async(prefix: str = "", max_keys: Optional[int] = None) -> list:
+    """
+    Same as list_files, but each page request runs on the storage executor
+    so the event loop keeps serving other requests during the round trips
+    """
+    client = get_storage_client()
+    if not client or not BUCKET_NAME:
         return []
+    
+    pager = _ListingPager(prefix, max_keys)
+    while (page_size := pager.next_page_size()) is not None:
+        pager.add(await run_storage_call(_list_page, client, dict(pager.kwargs), page_size))
+    return pager.files
 
 # Backward compatibility aliases
 get_b2_client = get_storage_client
 get_b2_url = get_file_url
 list_b2_files = list_files
+list_b2_files_async = list_files_async
 
 
@@ -0,0 +1,160 @@
+"""Online backfills for columns added by migrations
+
+Migrations only add the column, its function and the trigger that fills new
+and updated rows; existing rows are filled here by a background task started
+after the migrations, in id-ordered batches of short transactions, so the
+table is never locked and ingest keeps running. Progress is kept in
+schema_backfills, so a restart resumes where it stopped. Code that reads a
+backfilled column checks backfill_complete(name) and falls back to the source
+expression until the backfill has finished.
+"""
+import asyncio
+import asyncpg
+import os
+import time
+from typing import Tuple
+from .data_version import mark_documents_changed, on_data_version_change
+from .database import DATABASE_URL
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", "500"))
+# Seconds to sleep between batches, leaving room for ingest writers and vacuum
+BACKFILL_PAUSE = float(os.getenv("BACKFILL_PAUSE", "0.1"))
+
+# Only one worker runs the backfills (migrations.py uses 7240913)
+BACKFILL_LOCK_KEY = 7240914
+
+
+class Backfill:
+    """`assign` is the SET clause for rows matching `missing` (documents aliased as d)"""
+    
+    def __init__(self, name: str, assign: str, missing: str, finish: Tuple[str, ...] = ()):
+        self.name = name
+        self.assign = assign
+        self.missing = missing
+        # Statements run once every row is filled (e.g. dropping an index it replaces)
+        self.finish = finish
+
+
+BACKFILLS = (
+    Backfill(
+        "search_vector",
+        "search_vector = documents_search_vector(d.title, d.description, d.context, d.ocr_text)",
+        "d.search_vector IS NULL",
+        finish=("DROP INDEX CONCURRENTLY IF EXISTS idx_docs_ocr",),
+    ),
+    Backfill(
+        "collection",
+        "collection = documents_collection(d.type, d.file_path)",
+        "d.collection IS NULL",
+    ),
+    Backfill(
+        "dimensions",
+        "type_id = (SELECT t.id FROM document_types t WHERE t.name = d.type), "
+        "source_id = (SELECT s.id FROM sources s WHERE s.name = d.source)",
+        "(d.type IS NOT NULL AND d.type_id IS NULL) OR (d.source IS NOT NULL AND d.source_id IS NULL)",
+        # Replaced by the smallint-keyed indexes from migration 007
+        finish=(
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_docs_type",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_docs_source",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_docs_type_id",
+            "DROP INDEX CONCURRENTLY IF EXISTS idx_docs_type_collection_id",
+        ),
+    ),
+)
+
+_completed = set()
+
+
+def backfill_complete(name: str) -> bool:
+    return name in _completed
+
+
+async def ensure_backfill_table(conn: asyncpg.Connection):
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+            name VARCHAR(100) PRIMARY KEY,
+            last_id BIGINT NOT NULL DEFAULT 0,
+            completed_at TIMESTAMP
+        )
+    """)
+
+
+async def load_backfill_state(conn: asyncpg.Connection):
+    """Read which backfills have finished (also re-read on every data version change)"""
+    try:
+        rows = await conn.fetch("SELECT name FROM schema_backfills WHERE completed_at IS NOT NULL")
+    except asyncpg.UndefinedTableError:
+        return
+    _completed.update(r['name'] for r in rows)
+
+on_data_version_change(load_backfill_state)
+
+
+async def _run_backfill(conn: asyncpg.Connection, backfill: Backfill):
+    last_id = await conn.fetchval("""
+        INSERT INTO schema_backfills (name) VALUES ($1)
+        ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+        RETURNING last_id
+    """, backfill.name)
+    print(f"Backfill {backfill.name}: starting after id {last_id}")
+    
+    updated = 0
+    batches = 0
+    started = time.monotonic()
+    while True:
+        # A fixed number of rows per batch by primary key, whether or not they need filling
+        async with conn.transaction():
+            row = await conn.fetchrow(f"""
+                WITH batch AS (
+                    SELECT id FROM documents WHERE id > $1 ORDER BY id LIMIT $2
+                ),
+                filled AS (
+                    UPDATE documents d SET {backfill.assign}
+                    FROM batch
+                    WHERE d.id = batch.id AND ({backfill.missing})
+                    RETURNING d.id
+                )
+                SELECT (SELECT MAX(id) FROM batch) AS last_id, (SELECT COUNT(*) FROM filled) AS n
+            """, last_id, BACKFILL_BATCH_SIZE)
+            if row['last_id'] is None:
+                break
+            last_id = row['last_id']
+            updated += row['n']
+            await conn.execute("UPDATE schema_backfills SET last_id = $2 WHERE name = $1", backfill.name, last_id)
+        
+        batches += 1
+        if batches % 100 == 0:
+            rate = updated / max(time.monotonic() - started, 0.001)
+            print(f"Backfill {backfill.name}: {updated} rows filled ({rate:.0f}/s, last id {last_id})")
+        await asyncio.sleep(BACKFILL_PAUSE)
+    
+    # Outside a transaction, so they can use CONCURRENTLY
+    for statement in backfill.finish:
+        await conn.execute(statement)
+    await conn.execute("UPDATE schema_backfills SET completed_at = NOW() WHERE name = $1", backfill.name)
+    _completed.add(backfill.name)
+    print(f"✓ Backfill {backfill.name}: {updated} rows filled ({time.monotonic() - started:.1f}s)")
+
+
+async def run_backfills(dsn: str = DATABASE_URL):
+    """Run pending backfills on a dedicated connection; other workers skip while one holds the lock"""
+    if all(backfill_complete(b.name) for b in BACKFILLS):
+        return
+    
+    conn = await asyncpg.connect(dsn)
+    try:
+        if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", BACKFILL_LOCK_KEY):
+            return
+        await load_backfill_state(conn)
+        finished_any = False
+        for backfill in BACKFILLS:
+            if not backfill_complete(backfill.name):
+                await _run_backfill(conn, backfill)
+                finished_any = True
+        # Readers switch to the backfilled columns; bump the version so every
+        # worker reloads the state and cached results are recomputed
+        if finished_any:
+            await mark_documents_changed(conn)
+    finally:
+        # Closing the session releases the advisory lock
+        await conn.close()
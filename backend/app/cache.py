@@ -0,0 +1,154 @@
+"""Result cache for read endpoints, invalidated by the corpus data version
+
+The backend is pluggable: MemoryCache is per-process; anything implementing
+CacheBackend (e.g. a shared Redis cache) can be installed with set_cache_backend().
+"""
+import asyncpg
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+from .data_version import get_data_version
+
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(4 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+
+
+class CacheBackend(ABC):
+    """Storage interface for cached results"""
+    
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+    
+    @abstractmethod
+    async def set(self, key: str, value: Any, size: int):
+        ...
+    
+    @abstractmethod
+    async def clear(self):
+        ...
+    
+    def stats(self) -> dict:
+        return {}
+
+
+class NullCache(CacheBackend):
+    """Caching disabled"""
+    
+    async def get(self, key):
+        return None
+    
+    async def set(self, key, value, size):
+        pass
+    
+    async def clear(self):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """In-process LRU cache with a TTL and a byte budget"""
+    
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    async def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+    
+    async def set(self, key, value, size):
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, value)
+        self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+    
+    async def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+    
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_backend: CacheBackend = (
+    MemoryCache(RESULT_CACHE_MAX_BYTES, RESULT_CACHE_TTL) if RESULT_CACHE_BACKEND == "memory" else NullCache()
+)
+_generation = None
+
+
+def get_cache_backend() -> CacheBackend:
+    return _backend
+
+
+def set_cache_backend(backend: CacheBackend):
+    """Install a different cache backend (e.g. a shared one)"""
+    global _backend, _generation
+    _backend = backend
+    _generation = None
+
+
+def make_key(namespace: str, generation: int, params: dict) -> str:
+    """Cache key from the endpoint name, data generation and normalized parameters"""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return f"{namespace}:{generation}:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+async def cached_result(
+    pool: asyncpg.Pool,
+    namespace: str,
+    params: dict,
+    compute: Callable[[], Awaitable[Any]]
+) -> Any:
+    """
+    Return the cached result for (namespace, params), computing and storing it on a miss
+    A new data generation (bumped on ingest) drops every cached entry at once
+    """
+    global _generation
+    generation = await get_data_version(pool)
+    if generation != _generation:
+        await _backend.clear()
+        _generation = generation
+    
+    key = make_key(namespace, generation, params)
+    value = await _backend.get(key)
+    if value is not None:
+        return value
+    
+    value = await compute()
+    size = len(json.dumps(value, default=str))
+    if size <= RESULT_CACHE_MAX_ENTRY_BYTES:
+        await _backend.set(key, value, size)
+    return value
@@ -0,0 +1,24 @@
+"""Collection rules and ids shared by the database, storage and filesystem listings"""
+import hashlib
+from typing import Optional
+
+COLLECTION_FLIGHTLOGS = 'flightlogs'
+COLLECTION_GENERAL = 'general'
+
+# Keep in sync with documents_collection() in migrations/004_documents_collection.sql
+FLIGHTLOG_MARKERS = ("flight", "contact")
+
+
+def is_flightlog_path(path: Optional[str]) -> bool:
+    """Whether an image path belongs to the flight logs / contact book pages"""
+    if not path:
+        return False
+    path = path.lower()
+    return any(marker in path for marker in FLIGHTLOG_MARKERS)
+
+
+
+def stable_image_id(path: str) -> int:
+    """Id for an image listed outside the database, stable across processes and restarts"""
+    digest = hashlib.blake2b(path.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % (10**9)
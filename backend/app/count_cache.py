@@ -0,0 +1,47 @@
+"""Cached totals for filtered document listings"""
+import asyncpg
+import json
+import os
+from collections import OrderedDict
+from typing import Optional
+
+COUNT_CACHE_SIZE = int(os.getenv("COUNT_CACHE_SIZE", "1024"))
+
+# filter key -> total, valid only for _cache_version
+_counts = OrderedDict()
+_cache_version = None
+
+
+def _key(filters: dict) -> tuple:
+    return tuple(sorted(filters.items()))
+
+
+def get_cached_count(filters: dict, version: int) -> Optional[int]:
+    """Cached total for a normalized filter set, or None if missing or stale"""
+    if version != _cache_version:
+        return None
+    key = _key(filters)
+    total = _counts.get(key)
+    if total is not None:
+        _counts.move_to_end(key)
+    return total
+
+
+def store_count(filters: dict, version: int, total: int):
+    """Remember a total; a newer data version drops everything cached before it"""
+    global _cache_version
+    if version != _cache_version:
+        _counts.clear()
+        _cache_version = version
+    _counts[_key(filters)] = total
+    _counts.move_to_end(_key(filters))
+    while len(_counts) > COUNT_CACHE_SIZE:
+        _counts.popitem(last=False)
+
+
+async def estimate_count(conn: asyncpg.Connection, where_sql: str, params: list) -> int:
+    """Planner's row estimate for a documents filter, without scanning the table"""
+    plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM documents WHERE {where_sql}", *params)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,86 @@
+"""Corpus data version, bumped whenever documents are ingested or rewritten"""
+import asyncpg
+import os
+import time
+from datetime import datetime
+from typing import Optional
+from .people import refresh_person_counts
+from .stats_summary import refresh_stats_summary
+
+# How long an API process trusts its last read of the version (seconds)
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "5"))
+
+_version = None
+_updated_at = None
+_checked_at = 0.0
+_listeners = []
+
+
+def on_data_version_change(listener):
+    """Register `async listener(conn)`, awaited in this process whenever it sees a new version"""
+    _listeners.append(listener)
+
+
+async def _notify(conn: asyncpg.Connection):
+    for listener in _listeners:
+        try:
+            await listener(conn)
+        except Exception as e:
+            print(f"Warning: data version listener failed: {e}")
+
+
+def _remember(version: int, updated_at: Optional[datetime]):
+    global _version, _updated_at, _checked_at
+    _version = version
+    _updated_at = updated_at
+    _checked_at = time.monotonic()
+
+
+async def read_data_stamp(conn: asyncpg.Connection) -> tuple:
+    """Read (version, updated_at); (0, None) if migrations haven't been applied"""
+    try:
+        row = await conn.fetchrow("SELECT version, updated_at FROM data_version")
+    except asyncpg.UndefinedTableError:
+        return 0, None
+    return (row['version'], row['updated_at']) if row else (0, None)
+
+
+async def get_data_stamp(pool: asyncpg.Pool) -> tuple:
+    """(version, updated_at), re-read from the database at most every DATA_VERSION_TTL seconds"""
+    if _version is None or time.monotonic() - _checked_at >= DATA_VERSION_TTL:
+        async with pool.acquire() as conn:
+            previous = _version
+            _remember(*await read_data_stamp(conn))
+            if previous is not None and _version != previous:
+                await _notify(conn)
+    return _version, _updated_at
+
+
+async def get_data_version(pool: asyncpg.Pool) -> int:
+    """Current data version"""
+    version, _ = await get_data_stamp(pool)
+    return version
+
+
+async def mark_documents_changed(conn: asyncpg.Connection) -> int:
+    """
+    Call after ingesting or rewriting documents
+    Refreshes the stats and person count summaries and bumps the data
+    version so every API process drops its cached counts
+    """
+    await refresh_stats_summary(conn)
+    await refresh_person_counts(conn)
+    
+    try:
+        row = await conn.fetchrow("""
+            UPDATE data_version
+            SET version = version + 1, updated_at = NOW()
+            RETURNING version, updated_at
+        """)
+    except asyncpg.UndefinedTableError:
+        print("Warning: data_version table missing - run migrations to enable cache invalidation")
+        return 0
+    
+    _remember(row['version'], row['updated_at'])
+    await _notify(conn)
+    return row['version']
@@ -0,0 +1,66 @@
+"""In-memory resolver for the document_types / sources lookup tables
+
+Frontend tab names, aliases and partial source names resolve to smallint ids
+here, so listing and search filter with equality on indexed keys instead of
+`type = 'text'` / `source ILIKE '%x%'`. Reloaded whenever the data version
+changes (an ingest may add types or sources).
+"""
+import asyncpg
+from typing import List, Optional
+from .data_version import on_data_version_change
+
+
+class DimensionResolver:
+    """Name/alias -> id maps for document types and sources"""
+    
+    def __init__(self):
+        self.loaded = False
+        self.type_ids = {}    # lowercase name or alias -> id
+        self.type_names = {}  # id -> canonical name
+        self.sources = []     # (lowercase name, id)
+        self.source_aliases = {}
+    
+    async def load(self, conn: asyncpg.Connection):
+        try:
+            types = await conn.fetch("SELECT id, name FROM document_types")
+            sources = await conn.fetch("SELECT id, name FROM sources")
+            aliases = await conn.fetch("SELECT dimension, alias, target_id FROM dimension_aliases")
+        except asyncpg.UndefinedTableError:
+            # Migrations not applied yet: filters fall back to the text columns
+            self.loaded = False
+            return
+        
+        type_ids = {r['name'].lower(): r['id'] for r in types}
+        source_aliases = {}
+        for r in aliases:
+            if r['dimension'] == 'type':
+                type_ids.setdefault(r['alias'].lower(), r['target_id'])
+            else:
+                source_aliases[r['alias'].lower()] = r['target_id']
+        
+        self.type_ids = type_ids
+        self.type_names = {r['id']: r['name'] for r in types}
+        self.sources = [(r['name'].lower(), r['id']) for r in sources]
+        self.source_aliases = source_aliases
+        self.loaded = True
+    
+    def type_id(self, name: str) -> Optional[int]:
+        return self.type_ids.get(name.lower())
+    
+    def canonical_type(self, name: str) -> str:
+        """Tab name or alias -> stored type name (unknown names pass through)"""
+        type_id = self.type_id(name)
+        return self.type_names.get(type_id, name)
+    
+    def source_ids(self, fragment: str) -> List[int]:
+        """Ids of sources whose name contains `fragment` (case-insensitive), plus alias hits"""
+        fragment = fragment.lower()
+        ids = [source_id for name, source_id in self.sources if fragment in name]
+        alias_id = self.source_aliases.get(fragment)
+        if alias_id is not None and alias_id not in ids:
+            ids.append(alias_id)
+        return ids
+
+
+document_dimensions = DimensionResolver()
+on_data_version_change(document_dimensions.load)
@@ -0,0 +1,81 @@
+"""Streaming NDJSON / CSV export of listing and search results
+
+Rows come from a server-side cursor inside a transaction and are written out
+in batches as the client reads them, so memory stays constant whatever the
+size of the result set.
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+from typing import AsyncIterator, Callable, Optional
+from .search import search_match
+
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "500"))
+# Each export holds a pool connection for its whole duration
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+export_slots = asyncio.Semaphore(EXPORT_MAX_CONCURRENT)
+
+
+def build_export_query(where_sql: str, columns: str, q: Optional[str]) -> str:
+    """Listing order (newest first) without a query; relevance order with one ($1 = query text)"""
+    if q:
+        match_sql, vector_sql = search_match()
+        return f"""
+            -- name: export_search
+            SELECT {columns}
+            FROM documents, plainto_tsquery('english', $1) query
+            WHERE {match_sql}
+            AND {where_sql}
+            ORDER BY ts_rank({vector_sql}, query) DESC, id DESC
+        """
+    return f"""
+        -- name: export_documents
+        SELECT {columns}
+        FROM documents
+        WHERE {where_sql}
+        ORDER BY id DESC
+    """
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return "" if value is None else value
+
+
+def _encode_batch(items: list, fields: list, fmt: str) -> bytes:
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([_csv_value(item.get(f)) for f in fields] for item in items)
+        return buffer.getvalue().encode()
+    return "".join(json.dumps(item, default=str) + "\n" for item in items).encode()
+
+
+async def stream_export(pool, sql: str, params: list, fields: list, fmt: str,
+                        format_row: Callable[[dict], dict]) -> AsyncIterator[bytes]:
+    """
+    Yield encoded batches from a server-side cursor
+    The generator only fetches the next batch once the previous one has been
+    sent, so a slow client slows the cursor down instead of filling memory
+    """
+    async with export_slots:
+        if fmt == "csv":
+            yield _encode_batch([{f: f for f in fields}], fields, fmt)
+        
+        async with pool.acquire() as conn:
+            async with conn.transaction(readonly=True):
+                cursor = await conn.cursor(sql, *params)
+                while True:
+                    rows = await cursor.fetch(EXPORT_BATCH_ROWS)
+                    if not rows:
+                        break
+                    yield _encode_batch([format_row(row) for row in rows], fields, fmt)
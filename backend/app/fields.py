@@ -0,0 +1,72 @@
+"""Field projection (`fields=` / `include=`) for listing and search responses"""
+from typing import Optional
+
+# Response field -> documents columns it is built from
+FIELD_COLUMNS = {
+    "id": ("id",),
+    "efta_id": ("efta_id",),
+    "title": ("title",),
+    "source": ("source",),
+    "type": ("type",),
+    "subtype": ("subtype",),
+    "description": ("description",),
+    "context": ("context",),
+    "date": ("date_released",),
+    "date_released": ("date_released",),
+    "url": ("url", "file_path"),
+    "file_path": ("file_path",),
+    "thumbnail_path": ("thumbnail_path", "url", "file_path", "type"),
+    "thumbnail_url": ("thumbnail_path", "url", "file_path", "type"),
+    "duration": ("duration",),
+    "location": ("location",),
+    "downloadable": ("downloadable",),
+    "redacted": ("redacted",),
+    "ocr_text": ("ocr_text",),
+    "metadata": ("metadata",),
+}
+
+# Large (TOASTed) text columns are cut down in SQL so the full value never leaves Postgres
+COLUMN_SQL = {
+    "ocr_text": "LEFT({t}ocr_text, 1000) AS ocr_text",
+}
+
+PRESETS = {
+    # Grid view: enough to draw a tile
+    "card": ("id", "title", "type", "thumbnail_path", "thumbnail_url"),
+    # Everything except the OCR excerpt
+    "summary": tuple(f for f in FIELD_COLUMNS if f != "ocr_text"),
+    "full": tuple(FIELD_COLUMNS),
+}
+
+
+def resolve_fields(fields: Optional[str], include: Optional[str] = None, default: str = "full") -> list:
+    """
+    Turn `fields` (preset names and/or field names, comma separated) plus
+    `include` (extra fields) into an ordered list of response fields
+    Raises ValueError on unknown names
+    """
+    requested = []
+    for token in [t.strip() for t in (fields or default).split(",")] + [t.strip() for t in (include or "").split(",")]:
+        if not token:
+            continue
+        if token in PRESETS:
+            requested.extend(PRESETS[token])
+        elif token in FIELD_COLUMNS:
+            requested.append(token)
+        else:
+            raise ValueError(f"Unknown field '{token}'")
+    
+    # id is always returned - it's the cursor and the key for detail lookups
+    return list(dict.fromkeys(["id"] + requested))
+
+
+def select_columns(fields: list, table: Optional[str] = None) -> str:
+    """SELECT list covering exactly the columns the requested fields need, optionally table-qualified"""
+    t = f"{table}." if table else ""
+    columns = dict.fromkeys(c for f in fields for c in FIELD_COLUMNS[f])
+    return ", ".join(COLUMN_SQL.get(c, "{t}" + c).format(t=t) for c in columns)
+
+
+def project(item: dict, fields: list) -> dict:
+    """Keep only the requested fields of a formatted item"""
+    return {f: item[f] for f in fields if f in item}
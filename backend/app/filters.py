@@ -0,0 +1,137 @@
+"""Shared filter handling for document listing endpoints"""
+from datetime import date, timedelta
+from typing import Optional
+from .backfills import backfill_complete
+from .categories import COLLECTION_FLIGHTLOGS, COLLECTION_GENERAL
+from .dimensions import document_dimensions
+
+# Map frontend tab IDs to database types
+# (fallback only: once migrations are applied the dimension_aliases table is used)
+TYPE_MAP = {
+    'videos': 'video',
+    'audio': 'audio',
+    'images': 'image',
+    'emails': 'email',
+    'documents': 'document',
+    'photo': 'image'  # Also support 'photo' for images
+}
+
+# date_field values accepted by the API -> documents column
+DATE_FIELDS = {
+    'released': 'date_released',
+    'original': 'date_original',
+}
+
+
+def normalize_document_filters(
+    type: Optional[str] = None,
+    source: Optional[str] = None,
+    year: Optional[int] = None,
+    flightlogs: Optional[bool] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    date_field: str = 'released'
+) -> dict:
+    """
+    Canonical form of the listing filters, used for SQL, cursors and cache keys
+    Raises ValueError on an impossible year or date range
+    """
+    filters = {}
+    
+    if type and type != 'all':
+        if document_dimensions.loaded:
+            filters['type'] = document_dimensions.canonical_type(type)
+        else:
+            filters['type'] = TYPE_MAP.get(type, type)
+    
+    if source and source.strip():
+        # Partial, case-insensitive match, so case doesn't change the result set
+        filters['source'] = source.strip().lower()
+    
+    if year:
+        if not 1 <= year <= 9998:
+            raise ValueError("year out of range")
+        filters['year'] = year
+    
+    # date_to is inclusive for callers; build_document_where turns it into a half-open bound
+    if date_from and date_to and date_from > date_to:
+        raise ValueError("date_from is after date_to")
+    if date_from or date_to:
+        if date_field not in DATE_FIELDS:
+            raise ValueError(f"Unknown date_field '{date_field}'")
+        filters['date_field'] = date_field
+        if date_from:
+            filters['date_from'] = date_from
+        # date.max has no next day to bound by, and nothing is later anyway
+        if date_to and date_to < date.max:
+            filters['date_to'] = date_to
+    
+    if flightlogs is not None:
+        filters['flightlogs'] = flightlogs
+    
+    return filters
+
+
+def build_document_where(filters: dict, start_idx: int = 1):
+    """Translate normalized filters into a WHERE clause, returns (where_sql, params)"""
+    where_clauses = []
+    params = []
+    idx = start_idx
+    
+    # Type and source resolve to smallint keys in memory (see dimensions.py);
+    # the text predicates are only used until the dimensions backfill has
+    # filled type_id / source_id for every existing row
+    dims = document_dimensions
+    use_keys = dims.loaded and backfill_complete("dimensions")
+    
+    if 'type' in filters:
+        type_id = dims.type_id(filters['type']) if use_keys else None
+        if type_id is not None:
+            where_clauses.append(f"type_id = ${idx}")
+            params.append(type_id)
+            idx += 1
+        elif use_keys:
+            where_clauses.append("false")
+        else:
+            where_clauses.append(f"type = ${idx}")
+            params.append(filters['type'])
+            idx += 1
+    
+    if 'source' in filters:
+        if use_keys:
+            where_clauses.append(f"source_id = ANY(${idx}::smallint[])")
+            params.append(dims.source_ids(filters['source']))
+        else:
+            where_clauses.append(f"source ILIKE ${idx}")
+            params.append(f"%{filters['source']}%")
+        idx += 1
+    
+    # Dates as half-open ranges on the bare column (not EXTRACT(...)) so btrees apply
+    if 'year' in filters:
+        where_clauses.append(f"date_released >= ${idx} AND date_released < ${idx + 1}")
+        params.extend([date(filters['year'], 1, 1), date(filters['year'] + 1, 1, 1)])
+        idx += 2
+    
+    if 'date_field' in filters:
+        column = DATE_FIELDS[filters['date_field']]
+        if 'date_from' in filters:
+            where_clauses.append(f"{column} >= ${idx}")
+            params.append(filters['date_from'])
+            idx += 1
+        if 'date_to' in filters:
+            where_clauses.append(f"{column} < ${idx}")
+            params.append(filters['date_to'] + timedelta(days=1))
+            idx += 1
+    
+    # Flight logs / contact book pages are precomputed into documents.collection
+    # (computed on the fly for rows the collection backfill hasn't reached yet)
+    if 'flightlogs' in filters:
+        if backfill_complete("collection"):
+            where_clauses.append(f"collection = ${idx}")
+        else:
+            where_clauses.append(f"(collection = ${idx} OR (collection IS NULL AND documents_collection(type, file_path) = ${idx}))")
+        params.append(COLLECTION_FLIGHTLOGS if filters['flightlogs'] else COLLECTION_GENERAL)
+        idx += 1
+    
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    return where_sql, params
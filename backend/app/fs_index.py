@@ -0,0 +1,154 @@
+"""Incremental in-memory index of extracted images on the local filesystem
+
+Used when running without a database or object storage. The index is built
+once, then refreshed by re-scanning only folders whose directory mtime
+changed (adding or removing a file bumps its folder's mtime), so listing
+and counting no longer glob the whole tree per request.
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional
+from .categories import COLLECTION_FLIGHTLOGS, COLLECTION_GENERAL, is_flightlog_path
+
+FS_INDEX_REFRESH = float(os.getenv("FS_INDEX_REFRESH", "30"))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class ImagePartition:
+    """Sorted image paths (relative to the data dir) plus one thumbnail-present flag per path"""
+    __slots__ = ("paths", "has_thumb", "png_count")
+    
+    def __init__(self, paths: tuple, has_thumb: bytearray):
+        self.paths = paths
+        self.has_thumb = has_thumb
+        # /api/stats has always counted PNG pages only
+        self.png_count = sum(1 for path in paths if path.endswith(".png"))
+
+
+class FilesystemImageIndex:
+    """Image files under `extracted_dir`, indexed per folder and partitioned by collection"""
+    
+    def __init__(self, data_dir: Path, extracted_dir: Path, thumbnail_dir: Path):
+        self.data_dir = data_dir
+        self.extracted_dir = extracted_dir
+        self.thumbnail_dir = thumbnail_dir
+        # folder path relative to data_dir -> {"mtime", "thumb_mtime", "subdirs", "images", "thumbs", "flightlogs"}
+        self._folders = {}
+        self.partitions = {COLLECTION_GENERAL: ImagePartition((), bytearray()), COLLECTION_FLIGHTLOGS: ImagePartition((), bytearray())}
+        self.built_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    def _scan_folder(self, folder: Path, rel: str, mtime: float, thumb_mtime: float) -> dict:
+        subdirs, images = [], []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.name.endswith(IMAGE_EXTENSIONS):
+                    images.append(entry.name)
+        
+        thumbs = set()
+        if thumb_mtime:
+            thumbs = set(os.listdir(self.thumbnail_dir / rel)).intersection(images)
+        
+        return {
+            "mtime": mtime,
+            "thumb_mtime": thumb_mtime,
+            "subdirs": subdirs,
+            "images": images,
+            "thumbs": thumbs,
+            "flightlogs": is_flightlog_path(folder.name),
+        }
+    
+    def _refresh_sync(self) -> bool:
+        """Re-scan changed folders; returns True if anything changed (blocking)"""
+        if not self.extracted_dir.exists():
+            changed = bool(self._folders)
+            self._folders = {}
+            return changed
+        
+        seen = {}
+        changed = False
+        pending = [self.extracted_dir]
+        while pending:
+            folder = pending.pop()
+            rel = folder.relative_to(self.data_dir).as_posix()
+            try:
+                mtime = folder.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            try:
+                thumb_mtime = (self.thumbnail_dir / rel).stat().st_mtime
+            except FileNotFoundError:
+                thumb_mtime = 0.0
+            
+            entry = self._folders.get(rel)
+            if entry is None or entry["mtime"] != mtime or entry["thumb_mtime"] != thumb_mtime:
+                entry = self._scan_folder(folder, rel, mtime, thumb_mtime)
+                changed = True
+            
+            seen[rel] = entry
+            pending.extend(folder / name for name in entry["subdirs"])
+        
+        if set(seen) != set(self._folders):
+            changed = True
+        self._folders = seen
+        return changed
+    
+    def _rebuild_partitions(self):
+        grouped = {COLLECTION_GENERAL: [], COLLECTION_FLIGHTLOGS: []}
+        for rel, entry in self._folders.items():
+            collection = COLLECTION_FLIGHTLOGS if entry["flightlogs"] else COLLECTION_GENERAL
+            for name in entry["images"]:
+                grouped[collection].append((f"{rel}/{name}", name in entry["thumbs"]))
+        
+        partitions = {}
+        for collection, items in grouped.items():
+            # Same order as sorting Path objects: component by component
+            items.sort(key=lambda item: item[0].split("/"))
+            partitions[collection] = ImagePartition(
+                tuple(path for path, _ in items),
+                bytearray(has_thumb for _, has_thumb in items)
+            )
+        self.partitions = partitions
+    
+    def _update(self):
+        started = time.monotonic()
+        if self._refresh_sync() or self.built_at is None:
+            self._rebuild_partitions()
+            print(f"Filesystem image index: {len(self.partitions[COLLECTION_GENERAL].paths)} images, "
+                  f"{len(self.partitions[COLLECTION_FLIGHTLOGS].paths)} flight log pages "
+                  f"({time.monotonic() - started:.2f}s)")
+        self.built_at = time.time()
+    
+    async def refresh(self):
+        """Incrementally refresh off the event loop"""
+        async with self._lock:
+            await asyncio.to_thread(self._update)
+    
+    async def ensure_built(self):
+        """Build on first use if the background refresh hasn't run yet"""
+        if self.built_at is None:
+            async with self._lock:
+                if self.built_at is None:
+                    await asyncio.to_thread(self._update)
+    
+    def partition(self, collection: str) -> ImagePartition:
+        return self.partitions[collection]
+    
+    def thumbnail_path(self, rel_path: str) -> str:
+        """Thumbnail location (relative to the data dir) for an indexed image"""
+        return f"{self.thumbnail_dir.relative_to(self.data_dir).as_posix()}/{rel_path}"
+
+
+async def refresh_index_forever(index: FilesystemImageIndex, interval: float = FS_INDEX_REFRESH):
+    """Background task: keep the filesystem index fresh until cancelled"""
+    while True:
+        try:
+            await index.refresh()
+        except Exception as e:
+            print(f"Error refreshing filesystem image index: {e}")
+        await asyncio.sleep(interval)
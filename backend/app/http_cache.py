@@ -0,0 +1,82 @@
+"""Conditional GET (ETag / Last-Modified / 304) for read endpoints
+
+Responses only change when an ingest bumps the data version, so the ETag is
+the data version plus a hash of the request path and query. A client that
+sends a current tag gets a 304 without the handler (or the database) running.
+/api/suggest answers from the in-memory index, which lags the data version
+while it rebuilds, so it only gets validators once the index has caught up.
+"""
+import hashlib
+import os
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request
+from fastapi.responses import Response
+from .data_version import get_data_stamp
+from .suggest import suggest_index
+
+# Read endpoints whose output depends only on the corpus and the request
+CONDITIONAL_PATH_PREFIXES = ("/api/stats", "/api/people", "/api/documents", "/api/search", "/api/suggest")
+
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", "0"))
+
+
+def make_etag(version: int, request: Request) -> str:
+    """Weak ETag from the data version and the normalized request parameters"""
+    query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+    digest = hashlib.sha1(f"{request.url.path}?{query}".encode()).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on either side
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        # "-0000" zone: RFC 5322 says UTC, but the parser returns it naive
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified.replace(microsecond=0) <= since
+
+
+async def conditional_get(request: Request, call_next):
+    """HTTP middleware adding validators to read endpoints and answering 304s"""
+    pool = getattr(request.app.state, "pool", None)
+    if request.method != "GET" or not pool or not request.url.path.startswith(CONDITIONAL_PATH_PREFIXES):
+        return await call_next(request)
+    
+    version, updated_at = await get_data_stamp(pool)
+    if request.url.path.startswith("/api/suggest") and suggest_index.version != version:
+        # Not built yet or still rebuilding: the response may come from an older index
+        return await call_next(request)
+    etag = make_etag(version, request)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={HTTP_CACHE_MAX_AGE}, must-revalidate",
+    }
+    last_modified = updated_at.replace(tzinfo=timezone.utc) if updated_at else None
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        not_modified = bool(if_modified_since and last_modified and _not_modified_since(if_modified_since, last_modified))
+    
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    
+    response = await call_next(request)
+    if response.status_code == 200:
+        response.headers.update(headers)
+    return response
@@ -1,12 +1,20 @@
 """Ingest files from R2 into database"""
 import asyncpg
 import os
-from .b2_client import list_files
+from .b2_client import list_files_async
+from .categories import is_flightlog_path
 
-async def ingest_from_r2_async(conn: asyncpg.Connection):
-    """Ingest files from R2 storage into database"""
+async def ingest_from_r2_async(conn: asyncpg.Connection, job=None):
+    """Ingest files from R2 storage into database
+    
+    Pass a jobs.Job as `job` to report progress and per-file errors
+    """
     print("Listing files from R2...")
-    all_files = list_files()  # Get all files
+    try:
+        all_files = await list_files_async()  # Get all files
+    except Exception as e:
+        # Never ingest from a partial listing
+        return {"error": f"Listing R2 failed: {e}"}
     
     if not all_files:
         return {"error": "No files found in R2. Make sure R2 credentials are configured."}
@@ -19,6 +27,10 @@ async def ingest_from_r2_async(conn: asyncpg.Connection):
     audio = [f for f in all_files if f.endswith(('.wav', '.mp3', '.m4a'))]
     
     inserted = 0
+    done = 0
+    total = min(len(images), 1000) + len(videos) + len(audio)
+    if job:
+        job.progress(0, total, phase="inserting")
     
     # Ingest images
     for file_path in images[:1000]:  # Limit to 1000 for now
@@ -29,7 +41,7 @@ async def ingest_from_r2_async(conn: asyncpg.Connection):
             
             # Determine if it's a flight log or regular image
             doc_type = "image"
-            if "flight" in file_path.lower() or "contact" in file_path.lower():
+            if is_flightlog_path(file_path):
                 source = "DOJ"
             
             # Don't set description - let frontend number them or use metadata
@@ -41,6 +53,11 @@ async def ingest_from_r2_async(conn: asyncpg.Connection):
             inserted += 1
         except Exception as e:
             print(f"Error inserting {file_path}: {e}")
+            if job:
+                job.item_error(f"{file_path}: {e}")
+        done += 1
+        if job:
+            job.progress(done)
     
     # Ingest videos
     for file_path in videos:
@@ -55,6 +72,11 @@ async def ingest_from_r2_async(conn: asyncpg.Connection):
             inserted += 1
         except Exception as e:
             print(f"Error inserting {file_path}: {e}")
+            if job:
+                job.item_error(f"{file_path}: {e}")
+        done += 1
+        if job:
+            job.progress(done)
     
     # Ingest audio
     for file_path in audio:
@@ -72,6 +94,11 @@ async def ingest_from_r2_async(conn: asyncpg.Connection):
             inserted += 1
         except Exception as e:
             print(f"Error inserting {file_path}: {e}")
+            if job:
+                job.item_error(f"{file_path}: {e}")
+        done += 1
+        if job:
+            job.progress(done)
     
     return {"success": True, "inserted": inserted, "total_files": len(all_files)}
 
@@ -0,0 +1,171 @@
+"""In-process background jobs for the admin ingest endpoints
+
+Submitting returns immediately with a job id; the work runs as an asyncio
+task (CPU-bound steps go to a small thread pool via run_blocking) and reports
+progress, throughput and errors that /api/admin/jobs/{id} serves. Only one
+job of a kind runs at a time, and running jobs can be cancelled.
+"""
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Finished jobs kept for polling
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "50"))
+# Per-item errors kept on a job (the count is always exact)
+JOB_MAX_ERRORS = 100
+
+_executor = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="jobs")
+    return _executor
+
+
+async def run_blocking(func, *args):
+    """Run blocking work (PDF parsing, SQLite reads) off the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+class JobConflict(Exception):
+    """A job of the same kind is already queued or running"""
+    
+    def __init__(self, job: "Job"):
+        super().__init__(f"Job '{job.kind}' already running ({job.id})")
+        self.job = job
+
+
+class Job:
+    """State and progress of one background job"""
+    
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "queued"
+        self.phase = None
+        self.done = 0
+        self.total = None
+        self.error_count = 0
+        self.errors = []
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.task: Optional[asyncio.Task] = None
+    
+    def progress(self, done: int, total: Optional[int] = None, phase: Optional[str] = None):
+        """Report items done (and optionally the total / current phase)"""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if phase is not None:
+            self.phase = phase
+    
+    def item_error(self, message: str):
+        """Record a per-item failure that doesn't stop the job"""
+        self.error_count += 1
+        if len(self.errors) < JOB_MAX_ERRORS:
+            self.errors.append(message)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed", "cancelled")
+    
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "phase": self.phase,
+            "done": self.done,
+            "total": self.total,
+            "percent": round(100 * self.done / self.total, 1) if self.total else None,
+            "elapsed_seconds": round(elapsed, 1),
+            "items_per_second": round(self.done / elapsed, 2) if elapsed > 0 else None,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "error": self.error,
+            "result": self.result,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRunner:
+    """Runs jobs as tasks, one per kind at a time"""
+    
+    def __init__(self, history: int):
+        self.history = history
+        self.jobs = OrderedDict()
+        self._active = {}  # kind -> job
+    
+    def submit(self, kind: str, work: Callable[[Job], Awaitable[dict]]) -> Job:
+        """Start `work(job)` in the background; raises JobConflict if `kind` is already active"""
+        active = self._active.get(kind)
+        if active is not None and not active.finished:
+            raise JobConflict(active)
+        
+        job = Job(kind)
+        self._active[kind] = job
+        self.jobs[job.id] = job
+        self._trim()
+        job.task = asyncio.create_task(self._run(job, work))
+        return job
+    
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable[dict]]):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = await work(job)
+            # The ingest functions report soft failures as {"error": ...}
+            if isinstance(job.result, dict) and job.result.get("error"):
+                job.status = "failed"
+                job.error = job.result["error"]
+            else:
+                job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"Job {job.kind} ({job.id}) failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            if self._active.get(job.kind) is job:
+                del self._active[job.kind]
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is not None and not job.finished and job.task is not None:
+            job.task.cancel()
+        return job
+    
+    def cancel_all(self):
+        for job in self.jobs.values():
+            if not job.finished and job.task is not None:
+                job.task.cancel()
+    
+    def _trim(self):
+        while len(self.jobs) > self.history:
+            oldest = next((j for j in self.jobs.values() if j.finished), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest.id]
+
+
+job_runner = JobRunner(JOB_HISTORY)
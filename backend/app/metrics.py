@@ -0,0 +1,241 @@
+"""Latency histograms and counters in Prometheus text exposition format
+
+Covers HTTP requests (per route template and status), SQL statements
+(per statement name, via InstrumentedConnection) and object-storage calls.
+Rendered at /metrics; no client library needed.
+"""
+import asyncpg
+import re
+import time
+from typing import Callable, Dict, Optional, Tuple
+from fastapi import Request
+from starlette.routing import Match
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+    
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labelvalues, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {series[-1]}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+    
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._series: Dict[tuple, float] = {}
+    
+    def inc(self, amount: float, *labelvalues):
+        self._series[labelvalues] = self._series.get(labelvalues, 0) + amount
+    
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labelvalues, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time values read from a callback at scrape time
+    
+    Without labelnames `read` returns one number (or None to skip); with
+    labelnames it returns {label values tuple: number}
+    """
+    
+    def __init__(self, name: str, help: str, read: Callable, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelnames = labelnames
+    
+    def render(self) -> list:
+        value = self.read()
+        if value is None:
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        if self.labelnames:
+            for labelvalues, v in sorted(value.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {v}")
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+_registry = []
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+def render_metrics() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+HTTP_REQUEST_SECONDS = register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ("method", "route", "status")
+))
+DB_QUERY_SECONDS = register(Histogram(
+    "db_query_duration_seconds", "SQL statement latency by statement name",
+    ("statement", "method")
+))
+DB_QUERY_ROWS = register(Counter(
+    "db_query_rows_total", "Rows returned or affected by statement name",
+    ("statement",)
+))
+DB_QUERY_ERRORS = register(Counter(
+    "db_query_errors_total", "Failed SQL statements by statement name",
+    ("statement",)
+))
+STORAGE_CALL_SECONDS = register(Histogram(
+    "storage_call_duration_seconds", "Object-storage API call latency by operation",
+    ("operation",)
+))
+
+
+def _route_template(request: Request) -> str:
+    """Path template of the route the request was (or would have been) dispatched to
+    
+    scope["route"] is only set once the router runs, so responses from inner
+    middleware (304s from conditional_get, 429/503s from admission control)
+    are matched against the app's routes here
+    """
+    route = request.scope.get("route")
+    if route is None:
+        for candidate in request.app.router.routes:
+            if candidate.matches(request.scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def track_requests(request: Request, call_next):
+    """Middleware: record latency per route template (not per raw path, to bound label cardinality)"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        template = _route_template(request)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, request.method, template, str(status))
+
+
+# Statement names: an explicit leading "-- name: foo" comment, otherwise
+# "<verb>:<first table>" (e.g. "select:documents")
+_NAME_COMMENT = re.compile(r"^\s*--\s*name:\s*([\w.-]+)")
+_LEADING_COMMENTS = re.compile(r"^(\s*(--[^\n]*\n|/\*.*?\*/))*\s*", re.S)
+_FIRST_TABLE = re.compile(r"\b(?:from|into|update|table|view)\s+(?:concurrently\s+)?([a-z_][\w.]*)", re.I)
+
+_statement_names: Dict[str, str] = {}
+
+def statement_name(query: str) -> str:
+    name = _statement_names.get(query)
+    if name is None:
+        match = _NAME_COMMENT.match(query)
+        if match:
+            name = match.group(1)
+        else:
+            body = _LEADING_COMMENTS.sub("", query, count=1)
+            verb = body.split(None, 1)[0].lower() if body.strip() else "empty"
+            table = _FIRST_TABLE.search(body)
+            name = f"{verb}:{table.group(1).lower()}" if table else verb
+        if len(_statement_names) < 10000:
+            _statement_names[query] = name
+    return name
+
+
+def _status_rows(status: str) -> int:
+    # Command tags look like "UPDATE 5" / "INSERT 0 1"; SET etc. have no count
+    tail = status.rsplit(" ", 1)[-1] if status else ""
+    return int(tail) if tail.isdigit() else 0
+
+
+_query_observers = []
+
+def observe_queries(observer: Callable):
+    """Register observer(name, query, args, seconds, dsn), called after each successful statement"""
+    _query_observers.append(observer)
+
+
+class InstrumentedConnection(asyncpg.Connection):
+    """asyncpg connection that records per-statement timings and row counts"""
+    
+    # Set by create_pool, so observers know which server (primary or replica) ran the statement
+    dsn: Optional[str] = None
+    
+    async def _timed(self, method: str, query: str, args: tuple, call, rows: Callable):
+        name = statement_name(query)
+        started = time.perf_counter()
+        try:
+            result = await call
+        except Exception:
+            DB_QUERY_ERRORS.inc(1, name)
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_QUERY_SECONDS.observe(elapsed, name, method)
+        DB_QUERY_ROWS.inc(rows(result), name)
+        for observer in _query_observers:
+            observer(name, query, args, elapsed, self.dsn)
+        return result
+    
+    async def fetch(self, query, *args, **kwargs):
+        return await self._timed("fetch", query, args, super().fetch(query, *args, **kwargs), len)
+    
+    async def fetchrow(self, query, *args, **kwargs):
+        return await self._timed("fetchrow", query, args, super().fetchrow(query, *args, **kwargs),
+                                 lambda row: 0 if row is None else 1)
+    
+    async def fetchval(self, query, *args, **kwargs):
+        return await self._timed("fetchval", query, args, super().fetchval(query, *args, **kwargs),
+                                 lambda value: 0 if value is None else 1)
+    
+    async def execute(self, query, *args, **kwargs):
+        return await self._timed("execute", query, args, super().execute(query, *args, **kwargs), _status_rows)
@@ -0,0 +1,37 @@
+"""Apply incremental schema migrations from backend/migrations"""
+import asyncpg
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+# Arbitrary key so concurrent workers don't apply the same migration twice
+MIGRATION_LOCK_KEY = 7240913
+
+
+async def apply_migrations(conn: asyncpg.Connection) -> list:
+    """Apply pending *.sql migrations in filename order, returns names applied"""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(200) PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT NOW()
+        )
+    """)
+    
+    applied = []
+    await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+    try:
+        done = {r['name'] for r in await conn.fetch("SELECT name FROM schema_migrations")}
+        
+        for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+            if path.name in done:
+                continue
+            
+            print(f"Applying migration {path.name}...")
+            async with conn.transaction():
+                await conn.execute(path.read_text())
+                await conn.execute("INSERT INTO schema_migrations (name) VALUES ($1)", path.name)
+            applied.append(path.name)
+    finally:
+        await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+    
+    return applied
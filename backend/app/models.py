@@ -51,5 +51,6 @@ class StatsResponse(BaseModel):
     by_type: Dict[str, int]
     by_source: Dict[str, int]
 
-
-
+class DocumentBatchRequest(BaseModel):
+    ids: List[int] = []
+    efta_ids: List[str] = []
@@ -0,0 +1,35 @@
+"""Opaque keyset cursors for id-ordered listings"""
+import base64
+import hashlib
+import json
+
+
+def filter_fingerprint(filters: dict) -> str:
+    """Short stable hash of a normalized filter dict"""
+    payload = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def encode_cursor(last_id: int, fingerprint: str) -> str:
+    """Encode the last seen id and the filters it was produced under"""
+    raw = json.dumps({"id": last_id, "f": fingerprint}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> int:
+    """
+    Return the last seen id from a cursor
+    Raises ValueError if the cursor is malformed or was issued for different filters
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = int(data["id"])
+        cursor_fingerprint = data["f"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Malformed cursor")
+    
+    if cursor_fingerprint != fingerprint:
+        raise ValueError("Cursor does not match the current filters")
+    
+    return last_id
@@ -0,0 +1,36 @@
+"""People detected in document metadata, counted in Postgres"""
+import asyncpg
+from typing import Optional
+
+
+async def refresh_person_counts(conn: asyncpg.Connection):
+    """Recompute the person_counts view without blocking readers"""
+    try:
+        await conn.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY person_counts")
+    except asyncpg.UndefinedTableError:
+        print("Warning: person_counts view missing - run migrations to enable /api/people metadata counts")
+
+
+async def top_detected_people(conn: asyncpg.Connection, limit: int, doc_type: Optional[str] = None) -> list:
+    """Top-N names from metadata.detected_people with document counts, optionally for one type"""
+    if doc_type:
+        rows = await conn.fetch("""
+            SELECT name, doc_count
+            FROM person_counts
+            WHERE type = $1
+            ORDER BY doc_count DESC, name
+            LIMIT $2
+        """, doc_type, limit)
+    else:
+        rows = await conn.fetch("""
+            SELECT name, SUM(doc_count)::bigint AS doc_count
+            FROM person_counts
+            GROUP BY name
+            ORDER BY doc_count DESC, name
+            LIMIT $1
+        """, limit)
+    
+    return [
+        {"id": i, "name": r['name'], "description": None, "doc_count": r['doc_count']}
+        for i, r in enumerate(rows)
+    ]
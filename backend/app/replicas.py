@@ -0,0 +1,152 @@
+"""Read replicas for the read-only endpoints
+
+DATABASE_REPLICA_URLS (comma separated) adds one pool per streaming replica.
+A background check records each replica's replay lag and data version;
+read_pool() hands out the least busy replica that is reachable, within
+REPLICA_MAX_LAG_SECONDS, and has caught up with the primary's data version
+(so results cached under a new version never come from pre-ingest rows).
+Otherwise reads fall back to the primary. Admin, ingest and anything that
+writes keep using the primary pool directly.
+"""
+import asyncio
+import os
+import time
+from typing import List, Optional
+from .data_version import get_data_version, read_data_stamp
+from .database import TrackedPool, create_pool, display_name
+from .metrics import Gauge, register
+
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+# Replicas further behind than this (seconds of replay lag) stop taking reads
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "10"))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", "5"))
+REPLICA_CHECK_TIMEOUT = float(os.getenv("REPLICA_CHECK_TIMEOUT", "2"))
+
+# 0 when the replica has replayed everything it received (an idle primary
+# leaves pg_last_xact_replay_timestamp() old without the replica being behind)
+REPLICA_LAG_SQL = """
+    SELECT pg_is_in_recovery() AS in_recovery,
+           CASE
+               WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+               ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+           END::float8 AS lag_seconds
+"""
+
+
+class Replica:
+    """One replica pool and the result of its last health check"""
+    
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        self.name = display_name(dsn)
+        self.pool: Optional[TrackedPool] = None
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.data_version: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.reads = 0
+    
+    async def check(self):
+        try:
+            if self.pool is None:
+                self.pool = await create_pool(self.dsn)
+            async with self.pool.acquire(timeout=REPLICA_CHECK_TIMEOUT) as conn:
+                row = await conn.fetchrow(REPLICA_LAG_SQL, timeout=REPLICA_CHECK_TIMEOUT)
+                version, _ = await read_data_stamp(conn)
+        except Exception as e:
+            self.healthy = False
+            self.last_error = str(e) or type(e).__name__
+        else:
+            self.lag_seconds = row['lag_seconds']
+            self.data_version = version
+            self.last_error = None if row['in_recovery'] else "not in recovery (promoted?)"
+            # A promoted replica is a separate writable server now, not a copy of the primary
+            self.healthy = row['in_recovery'] and self.lag_seconds <= REPLICA_MAX_LAG_SECONDS
+        self.checked_at = time.time()
+    
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "healthy": self.healthy,
+            "lag_seconds": round(self.lag_seconds, 3) if self.lag_seconds is not None else None,
+            "data_version": self.data_version,
+            "reads": self.reads,
+            "last_error": self.last_error,
+            "checked_at": self.checked_at,
+            "pool": self.pool.stats() if self.pool else None,
+        }
+
+
+class ReplicaSet:
+    """Replica pools with periodic health / lag checks"""
+    
+    def __init__(self, dsns: List[str]):
+        self.replicas = [Replica(dsn) for dsn in dsns]
+        self.primary_reads = 0
+        self._task: Optional[asyncio.Task] = None
+    
+    async def check_all(self):
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+    
+    def start(self):
+        """Check replicas in the background; reads go to the primary until one passes"""
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._check_forever())
+    
+    async def _check_forever(self):
+        first = True
+        while True:
+            try:
+                await self.check_all()
+            except Exception as e:
+                print(f"Error checking read replicas: {e}")
+            if first:
+                first = False
+                for replica in self.replicas:
+                    state = f"lag {replica.lag_seconds:.1f}s" if replica.healthy else f"unavailable ({replica.last_error})"
+                    print(f"Read replica {replica.name}: {state}")
+            await asyncio.sleep(REPLICA_CHECK_INTERVAL)
+    
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for replica in self.replicas:
+            if replica.pool:
+                await replica.pool.close()
+                replica.pool = None
+            replica.healthy = False
+    
+    async def read_pool(self, primary: TrackedPool) -> TrackedPool:
+        """Least busy usable replica, or `primary` when none qualifies"""
+        if self.replicas:
+            version = await get_data_version(primary)
+            candidates = [
+                r for r in self.replicas
+                if r.healthy and r.pool is not None and (r.data_version or 0) >= version
+            ]
+            if candidates:
+                replica = min(candidates, key=lambda r: (r.pool.in_use + r.pool.waiting, r.reads))
+                replica.reads += 1
+                return replica.pool
+        self.primary_reads += 1
+        return primary
+    
+    def status(self) -> dict:
+        return {
+            "configured": len(self.replicas),
+            "healthy": sum(1 for r in self.replicas if r.healthy),
+            "max_lag_seconds": REPLICA_MAX_LAG_SECONDS,
+            "primary_reads": self.primary_reads,
+            "replicas": [r.status() for r in self.replicas],
+        }
+
+
+replica_set = ReplicaSet(DATABASE_REPLICA_URLS)
+
+register(Gauge("db_replica_healthy", "1 if the replica is taking reads",
+               lambda: {(r.name,): int(r.healthy) for r in replica_set.replicas} or None, ("replica",)))
+register(Gauge("db_replica_lag_seconds", "Replay lag at the last health check",
+               lambda: {(r.name,): r.lag_seconds for r in replica_set.replicas if r.lag_seconds is not None} or None,
+               ("replica",)))
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, Query
 from typing import Optional
 from app.database import get_pool
+from app.filters import normalize_document_filters
+from app.search import run_search
 import asyncpg
 
 router = APIRouter()
 
+SEARCH_FIELDS = ["id", "efta_id", "title", "source", "type", "description", "file_path", "thumbnail_path"]
+
 async def get_db_pool():
     return await get_pool()
 
@@ -25,39 +29,13 @@ async def search(
             "per_page": per_page
         }
     
+    filters = normalize_document_filters(type=type)
+    
     async with pool.acquire() as conn:
-        type_filter = f"AND type = '{type.replace(\"'\", \"''\")}'" if type and type != 'all' else ""
-        
-        # Search query using PostgreSQL full-text search
-        search_query = f"""
-            SELECT id, efta_id, title, source, type, description, file_path, thumbnail_path,
-                   ts_rank(
-                       to_tsvector('english', COALESCE(ocr_text, '') || ' ' || COALESCE(description, '') || ' ' || COALESCE(title, '')),
-                       plainto_tsquery('english', $1)
-                   ) as rank,
-                   ts_headline('english', COALESCE(ocr_text, ''), plainto_tsquery('english', $1), 'MaxWords=30, MinWords=10') as snippet
-            FROM documents
-            WHERE to_tsvector('english', COALESCE(ocr_text, '') || ' ' || COALESCE(description, '') || ' ' || COALESCE(title, ''))
-                  @@ plainto_tsquery('english', $1)
-            {type_filter}
-            ORDER BY rank DESC, id DESC
-            LIMIT $2 OFFSET $3
-        """
-        
-        rows = await conn.fetch(search_query, q, per_page, (page - 1) * per_page)
-        
-        count_query = f"""
-            SELECT COUNT(*) 
-            FROM documents
-            WHERE to_tsvector('english', COALESCE(ocr_text, '') || ' ' || COALESCE(description, '') || ' ' || COALESCE(title, ''))
-                  @@ plainto_tsquery('english', $1)
-            {type_filter}
-        """
-        
-        total = await conn.fetchval(count_query, q)
+        found = await run_search(conn, q, filters, page, per_page, SEARCH_FIELDS)
         
         results = []
-        for row in rows:
+        for row in found["rows"]:
             results.append({
                 "id": row["id"],
                 "efta_id": row["efta_id"],
@@ -73,10 +51,7 @@ async def search(
         
         return {
             "results": results,
-            "total": total,
+            "total": found["total"],
             "page": page,
             "per_page": per_page
         }
-
-
-
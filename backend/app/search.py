@@ -0,0 +1,144 @@
+"""Full-text search over documents.search_vector, shared by main.py and routers/search.py"""
+import asyncpg
+import json
+import os
+from .backfills import backfill_complete
+from .count_cache import estimate_count
+from .fields import select_columns
+from .filters import build_document_where
+
+# Snippet defaults; the text window bounds ts_headline's cost per returned row
+SNIPPET_FRAGMENTS = int(os.getenv("SEARCH_SNIPPET_FRAGMENTS", "2"))
+SNIPPET_WINDOW = int(os.getenv("SEARCH_SNIPPET_WINDOW", "20000"))
+SNIPPET_MAX_WINDOW = 100000
+
+# The expression idx_docs_ocr (init.sql) indexes; rows the search_vector
+# backfill hasn't reached yet are matched on it
+LEGACY_SEARCH_VECTOR = "to_tsvector('english', COALESCE(ocr_text, '') || ' ' || COALESCE(description, '') || ' ' || COALESCE(title, ''))"
+
+
+def search_match(query: str = "query") -> tuple:
+    """(WHERE predicate, vector to rank on) matching documents against the tsquery `query`"""
+    if backfill_complete("search_vector"):
+        return f"search_vector @@ {query}", "search_vector"
+    return (
+        f"(search_vector @@ {query} OR (search_vector IS NULL AND {LEGACY_SEARCH_VECTOR} @@ {query}))",
+        f"COALESCE(search_vector, {LEGACY_SEARCH_VECTOR})"
+    )
+
+
+def snippet_options(fragments: int) -> str:
+    """ts_headline options for a given fragment count"""
+    return f"MaxFragments={fragments}, MaxWords=30, MinWords=10, FragmentDelimiter=' … '"
+
+
+async def run_search(
+    conn: asyncpg.Connection,
+    q: str,
+    filters: dict,
+    page: int,
+    per_page: int,
+    fields: list,
+    count: str = "exact",
+    snippet_fragments: int = SNIPPET_FRAGMENTS,
+    snippet_window: int = SNIPPET_WINDOW
+) -> dict:
+    """
+    Ranked page of matches for `q`, returns {"rows", "total", "facets"}
+    
+    count="exact" returns the total and per-type / per-source facet counts
+    from the same single scan of the matching set that produces the page;
+    "estimate" uses the planner's estimate and "none" skips counting.
+    
+    Snippets are computed in the outer query, only for the rows on the page,
+    over at most `snippet_window` characters of text - their cost doesn't grow
+    with the number of matches. snippet_fragments=0 skips them.
+    """
+    where_sql, filter_params = build_document_where(filters, start_idx=2)
+    match_sql, vector_sql = search_match()
+    params = [q] + filter_params
+    idx = len(params) + 1
+    params.extend([per_page, (page - 1) * per_page])
+    
+    snippet_sql = "NULL AS snippet"
+    if snippet_fragments > 0:
+        snippet_sql = f"""ts_headline(
+                'english',
+                LEFT(COALESCE(NULLIF(d.ocr_text, ''), d.description, d.title, ''), ${idx + 2}),
+                plainto_tsquery('english', $1),
+                ${idx + 3}
+            ) AS snippet"""
+        params.extend([min(snippet_window, SNIPPET_MAX_WINDOW), snippet_options(snippet_fragments)])
+    
+    page_sql = f"""
+        SELECT {select_columns(fields, table="d")}, ranked.rank,
+            {snippet_sql}
+        FROM ranked
+        JOIN documents d ON d.id = ranked.id
+    """
+    
+    if count != "exact":
+        rows = await conn.fetch(f"""
+            -- name: search_page
+            WITH ranked AS (
+                SELECT id, ts_rank({vector_sql}, query) AS rank
+                FROM documents, plainto_tsquery('english', $1) query
+                WHERE {match_sql}
+                AND {where_sql}
+                ORDER BY rank DESC, id DESC
+                LIMIT ${idx} OFFSET ${idx + 1}
+            )
+            {page_sql}
+            ORDER BY rank DESC, id DESC
+        """, *params)
+        
+        total = None
+        if count == "estimate":
+            estimate_match, _ = search_match("plainto_tsquery('english', $1)")
+            total = await estimate_count(conn, f"{estimate_match} AND {where_sql}", [q] + filter_params)
+        return {"rows": rows, "total": total, "facets": None}
+    
+    # GROUPING(type, source): 3 = (), 1 = (type), 2 = (source)
+    rows = await conn.fetch(f"""
+        -- name: search_faceted
+        WITH matches AS MATERIALIZED (
+            SELECT id, type, source, ts_rank({vector_sql}, query) AS rank
+            FROM documents, plainto_tsquery('english', $1) query
+            WHERE {match_sql}
+            AND {where_sql}
+        ),
+        ranked AS (
+            SELECT id, rank FROM matches
+            ORDER BY rank DESC, id DESC
+            LIMIT ${idx} OFFSET ${idx + 1}
+        ),
+        counts AS (
+            SELECT GROUPING(type, source) AS g, type, source, COUNT(*) AS n
+            FROM matches
+            GROUP BY GROUPING SETS ((), (type), (source))
+        ),
+        summary AS (
+            SELECT
+                COALESCE(SUM(n) FILTER (WHERE g = 3), 0)::bigint AS match_total,
+                COALESCE(json_object_agg(COALESCE(type, 'unknown'), n) FILTER (WHERE g = 1), '{{}}'::json) AS type_facets,
+                COALESCE(json_object_agg(source, n) FILTER (WHERE g = 2), '{{}}'::json) AS source_facets
+            FROM counts
+        )
+        SELECT summary.*, page.*
+        FROM summary
+        LEFT JOIN ({page_sql}) page ON true
+        ORDER BY page.rank DESC, page.id DESC
+    """, *params)
+    
+    first = rows[0]
+    facets = {
+        "type": _json(first['type_facets']),
+        "source": _json(first['source_facets'])
+    }
+    # An empty page still yields the summary row, with NULL document columns
+    page_rows = [r for r in rows if r['id'] is not None]
+    return {"rows": page_rows, "total": first['match_total'], "facets": facets}
+
+
+def _json(value):
+    return json.loads(value) if isinstance(value, str) else value
@@ -0,0 +1,125 @@
+"""Slow-query log with sampled EXPLAIN (ANALYZE, BUFFERS) capture
+
+Statements slower than SLOW_QUERY_MS are recorded in a ring buffer (served at
+/api/admin/slow-queries). A sample of the read-only ones is re-run under
+EXPLAIN in the background, on a dedicated connection to the server (primary
+or replica) that ran it and with the pool's session settings, so we can see
+which filter combinations fall off the indexes without slowing the request
+itself.
+"""
+import asyncio
+import asyncpg
+import json
+import os
+import random
+import re
+import time
+from collections import deque
+from typing import Dict, Optional
+from .database import DATABASE_URL, DB_SERVER_SETTINGS, display_name
+from .metrics import observe_queries
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+# Fraction of slow read-only statements to EXPLAIN (0 disables plan capture)
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.1"))
+# statement_timeout for the EXPLAIN connection, since ANALYZE re-runs the query
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "10000"))
+
+_LEADING_COMMENTS = re.compile(r"^(\s*(--[^\n]*\n|/\*.*?\*/))*\s*", re.S)
+_WRITES = re.compile(r"\b(insert|update|delete|merge|truncate|refresh|create|drop|alter)\b", re.I)
+
+
+def normalize_statement(query: str) -> str:
+    """Collapse whitespace so identical statements group together"""
+    return " ".join(query.split())
+
+
+def _is_read_only(query: str) -> bool:
+    body = _LEADING_COMMENTS.sub("", query, count=1)
+    first = body.split(None, 1)[0].lower() if body.strip() else ""
+    return first in ("select", "with") and not _WRITES.search(body)
+
+
+def _param_repr(value) -> str:
+    text = repr(value)
+    return text if len(text) <= 200 else text[:200] + "..."
+
+
+class SlowQueryLog:
+    """Ring buffer of slow statements, with at most one EXPLAIN in flight"""
+    
+    def __init__(self, threshold_ms: float, size: int, explain_sample: float):
+        self.threshold = threshold_ms / 1000
+        self.explain_sample = explain_sample
+        self.entries = deque(maxlen=size)
+        self.total = 0
+        self._explain_conns: Dict[str, asyncpg.Connection] = {}  # dsn -> connection
+        # Held so the task isn't garbage collected mid-flight; done() frees the slot
+        self._explain_task: Optional[asyncio.Task] = None
+    
+    def observe(self, name: str, query: str, args: tuple, seconds: float, dsn: Optional[str]):
+        if seconds < self.threshold:
+            return
+        
+        dsn = dsn or DATABASE_URL
+        self.total += 1
+        entry = {
+            "statement_name": name,
+            "server": display_name(dsn),
+            "statement": normalize_statement(query),
+            "params": [_param_repr(a) for a in args],
+            "duration_ms": round(seconds * 1000, 1),
+            "at": time.time(),
+            "plan": None,
+        }
+        self.entries.append(entry)
+        print(f"Slow query {name}: {entry['duration_ms']}ms params={entry['params']}")
+        
+        explaining = self._explain_task is not None and not self._explain_task.done()
+        if (not explaining and self.explain_sample > 0 and random.random() < self.explain_sample
+                and _is_read_only(query)):
+            self._explain_task = asyncio.get_running_loop().create_task(self._explain(entry, dsn, query, args))
+    
+    async def _connect(self, dsn: str) -> asyncpg.Connection:
+        conn = self._explain_conns.get(dsn)
+        if conn is None or conn.is_closed():
+            # A plain connection outside the pool: not instrumented, never competes with requests
+            conn = self._explain_conns[dsn] = await asyncpg.connect(
+                dsn,
+                server_settings={**DB_SERVER_SETTINGS, "statement_timeout": str(SLOW_QUERY_EXPLAIN_TIMEOUT_MS)}
+            )
+        return conn
+    
+    async def _explain(self, entry: dict, dsn: str, query: str, args: tuple):
+        try:
+            conn = await self._connect(dsn)
+            async with conn.transaction(readonly=True):
+                plan = await conn.fetchval(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args)
+            entry["plan"] = json.loads(plan) if isinstance(plan, str) else plan
+        except Exception as e:
+            entry["plan_error"] = str(e)
+    
+    def recent(self, limit: int) -> list:
+        return list(reversed(self.entries))[:limit]
+    
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "explain_sample": self.explain_sample,
+            "slow_queries_total": self.total,
+            "buffered": len(self.entries),
+        }
+    
+    async def close(self):
+        if self._explain_task is not None:
+            self._explain_task.cancel()
+            self._explain_task = None
+        for conn in self._explain_conns.values():
+            if not conn.is_closed():
+                await conn.close()
+        self._explain_conns.clear()
+
+
+slow_query_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE, SLOW_QUERY_EXPLAIN_SAMPLE)
+observe_queries(slow_query_log.observe)
@@ -0,0 +1,28 @@
+"""Precomputed counts behind /api/stats"""
+import asyncpg
+
+
+async def refresh_stats_summary(conn: asyncpg.Connection):
+    """Recompute the stats_summary view without blocking readers"""
+    try:
+        await conn.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY stats_summary")
+    except asyncpg.UndefinedTableError:
+        print("Warning: stats_summary view missing - run migrations to enable /api/stats summary")
+
+
+async def read_stats_summary(conn: asyncpg.Connection) -> dict:
+    """Stats response built from the summary view in a single read"""
+    rows = await conn.fetch("SELECT dimension, key, count FROM stats_summary")
+    
+    stats = {"total_documents": 0, "by_type": {}, "by_source": {}, "flightlogs": 0}
+    for row in rows:
+        if row['dimension'] == 'total':
+            stats["total_documents"] = row['count']
+        elif row['dimension'] == 'type':
+            stats["by_type"][row['key']] = row['count']
+        elif row['dimension'] == 'source':
+            stats["by_source"][row['key']] = row['count']
+        elif row['dimension'] == 'collection' and row['key'] == 'flightlogs':
+            stats["flightlogs"] = row['count']
+    
+    return stats
@@ -0,0 +1,73 @@
+"""In-memory manifest of images in object storage, refreshed in the background
+
+Listing the bucket takes one request per 1000 keys, so /api/files/images
+serves from a sorted key array per collection that is built once and
+rebuilt every STORAGE_MANIFEST_REFRESH seconds.
+"""
+import asyncio
+import os
+import time
+from typing import Optional
+from .b2_client import list_files_async
+from .categories import COLLECTION_FLIGHTLOGS, COLLECTION_GENERAL, is_flightlog_path
+
+STORAGE_MANIFEST_REFRESH = float(os.getenv("STORAGE_MANIFEST_REFRESH", "600"))
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+
+class StorageManifest:
+    """Sorted image keys under one bucket prefix, partitioned by collection"""
+    
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.partitions = {COLLECTION_GENERAL: (), COLLECTION_FLIGHTLOGS: ()}
+        self.built_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+    
+    async def _build(self) -> dict:
+        """List the bucket and split image keys into sorted partitions"""
+        general, flightlogs = [], []
+        for key in await list_files_async(prefix=self.prefix):
+            if not key.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            (flightlogs if is_flightlog_path(key) else general).append(key)
+        return {COLLECTION_GENERAL: tuple(sorted(general)), COLLECTION_FLIGHTLOGS: tuple(sorted(flightlogs))}
+    
+    async def refresh(self):
+        """Rebuild the manifest off the event loop and swap it in"""
+        async with self._lock:
+            await self._refresh_locked()
+    
+    async def ensure_built(self):
+        """Build on first use if the background refresh hasn't finished yet"""
+        if self.built_at is None:
+            async with self._lock:
+                if self.built_at is None:
+                    await self._refresh_locked()
+    
+    async def _refresh_locked(self):
+        started = time.monotonic()
+        # A failed listing raises here and the previous manifest stays in place
+        partitions = await self._build()
+        self.partitions = partitions
+        self.built_at = time.time()
+        print(f"Storage manifest for '{self.prefix}': "
+              f"{len(partitions[COLLECTION_GENERAL])} images, {len(partitions[COLLECTION_FLIGHTLOGS])} flight log pages "
+              f"({time.monotonic() - started:.1f}s)")
+    
+    def keys(self, collection: str) -> tuple:
+        return self.partitions.get(collection, ())
+
+
+image_manifest = StorageManifest("extracted/")
+
+
+async def refresh_manifest_forever(manifest: StorageManifest, interval: float = STORAGE_MANIFEST_REFRESH):
+    """Background task: keep a manifest fresh until cancelled"""
+    while True:
+        try:
+            await manifest.refresh()
+        except Exception as e:
+            print(f"Error refreshing storage manifest: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,151 @@
+"""Typeahead suggestions from an in-memory sorted-prefix index
+
+Titles, people names (people table and metadata.detected_people) and EFTA
+ids are loaded once, normalized, and kept as one sorted key array; a lookup
+is a bisect plus a short forward scan. The index is rebuilt in the background
+when the data version changes, and requests keep using the previous one
+until the new one is swapped in.
+"""
+import asyncio
+import asyncpg
+import os
+import time
+from bisect import bisect_left
+from typing import Optional
+
+SUGGEST_MAX_TITLES = int(os.getenv("SUGGEST_MAX_TITLES", "200000"))
+SUGGEST_MAX_EFTA_IDS = int(os.getenv("SUGGEST_MAX_EFTA_IDS", "500000"))
+# Matches examined per lookup before ranking (bounds latency on 1-2 letter prefixes)
+SUGGEST_SCAN_LIMIT = int(os.getenv("SUGGEST_SCAN_LIMIT", "2000"))
+# Each entry is also reachable from the start of its 2nd..Nth word ("clin" -> "Bill Clinton")
+SUGGEST_WORD_STARTS = 4
+
+SUGGEST_KINDS = ("title", "person", "efta_id")
+
+
+def normalize_key(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+async def _load_entries(conn: asyncpg.Connection) -> list:
+    """(text, kind, doc_count) for everything that can be suggested"""
+    entries = []
+    
+    rows = await conn.fetch("""
+        -- name: suggest_titles
+        SELECT title, COUNT(*) AS n
+        FROM documents
+        WHERE title IS NOT NULL AND title <> ''
+        GROUP BY title
+        ORDER BY n DESC
+        LIMIT $1
+    """, SUGGEST_MAX_TITLES)
+    entries.extend((r['title'], "title", r['n']) for r in rows)
+    
+    names = {}
+    rows = await conn.fetch("""
+        -- name: suggest_people
+        SELECT p.name, p.normalized_name, COUNT(dp.document_id) AS n
+        FROM people p
+        LEFT JOIN document_people dp ON dp.person_id = p.id
+        GROUP BY p.id
+    """)
+    for r in rows:
+        names[r['name']] = names.get(r['name'], 0) + r['n']
+        if r['normalized_name'] and normalize_key(r['normalized_name']) != normalize_key(r['name']):
+            names[r['normalized_name']] = names.get(r['normalized_name'], 0) + r['n']
+    try:
+        rows = await conn.fetch("""
+            -- name: suggest_detected_people
+            SELECT name, SUM(doc_count)::bigint AS n
+            FROM person_counts
+            GROUP BY name
+        """)
+        for r in rows:
+            names[r['name']] = names.get(r['name'], 0) + r['n']
+    except asyncpg.UndefinedTableError:
+        pass
+    entries.extend((name, "person", n) for name, n in names.items())
+    
+    rows = await conn.fetch("""
+        -- name: suggest_efta_ids
+        SELECT DISTINCT efta_id
+        FROM documents
+        WHERE efta_id IS NOT NULL AND efta_id <> ''
+        LIMIT $1
+    """, SUGGEST_MAX_EFTA_IDS)
+    entries.extend((r['efta_id'], "efta_id", 1) for r in rows)
+    
+    return entries
+
+
+def _compile(entries: list) -> tuple:
+    """Sorted (key, entry index, word position) triples, split into parallel arrays (blocking)"""
+    triples = []
+    for i, (text, kind, _) in enumerate(entries):
+        words = normalize_key(text).split(" ")
+        for pos in range(min(len(words), SUGGEST_WORD_STARTS)):
+            triples.append((" ".join(words[pos:]), i, pos))
+    triples.sort()
+    return [t[0] for t in triples], [t[1] for t in triples], bytes(min(t[2], 255) for t in triples)
+
+
+class SuggestIndex:
+    """Sorted prefix keys over suggestion entries, rebuilt per data version"""
+    
+    def __init__(self):
+        self.entries = []
+        self.keys = []
+        self.refs = []
+        self.positions = b""
+        self.version: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def rebuild(self, pool, version: int):
+        async with self._lock:
+            if self.version == version:
+                return
+            started = time.monotonic()
+            async with pool.acquire() as conn:
+                entries = await _load_entries(conn)
+            keys, refs, positions = await asyncio.to_thread(_compile, entries)
+            self.entries, self.keys, self.refs, self.positions = entries, keys, refs, positions
+            self.version = version
+            print(f"Suggest index v{version}: {len(entries)} entries, {len(keys)} keys "
+                  f"({time.monotonic() - started:.1f}s)")
+    
+    async def ensure_current(self, pool, version: int):
+        """Build synchronously the first time; afterwards rebuild in the background and keep serving"""
+        if self.version is None:
+            await self.rebuild(pool, version)
+        elif self.version != version and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self.rebuild(pool, version))
+    
+    def lookup(self, q: str, limit: int, kinds: Optional[set] = None) -> list:
+        prefix = normalize_key(q)
+        if not prefix:
+            return []
+        
+        keys, refs, positions, entries = self.keys, self.refs, self.positions, self.entries
+        best = {}
+        i = bisect_left(keys, prefix)
+        end = min(len(keys), i + SUGGEST_SCAN_LIMIT)
+        while i < end and keys[i].startswith(prefix):
+            ref = refs[i]
+            text, kind, count = entries[ref]
+            if kinds is None or kind in kinds:
+                # Rank: whole-string prefix matches first, then by document count, then shorter
+                rank = (positions[i] > 0, -count, len(text))
+                if ref not in best or rank < best[ref]:
+                    best[ref] = rank
+            i += 1
+        
+        ranked = sorted(best.items(), key=lambda item: item[1])[:limit]
+        return [
+            {"text": entries[ref][0], "kind": entries[ref][1], "count": entries[ref][2]}
+            for ref, _ in ranked
+        ]
+
+
+suggest_index = SuggestIndex()
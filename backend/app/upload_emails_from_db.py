@@ -6,9 +6,13 @@ import json
 from pathlib import Path
 from datetime import datetime
 import asyncpg
+from .jobs import run_blocking
 
-async def upload_emails_from_db_async(conn: asyncpg.Connection, db_path: str = None):
-    """Read emails from SQLite database and upload to PostgreSQL"""
+async def upload_emails_from_db_async(conn: asyncpg.Connection, db_path: str = None, job=None):
+    """Read emails from SQLite database and upload to PostgreSQL
+    
+    Pass a jobs.Job as `job` to report progress and per-batch errors
+    """
     
     # Default database path
     if not db_path:
@@ -24,7 +28,8 @@ async def upload_emails_from_db_async(conn: asyncpg.Connection, db_path: str = N
     print(f"Connecting to offline database: {db_file}")
     
     try:
-        offline_db = sqlite3.connect(str(db_file))
+        # SQLite reads run on the job thread pool, not the thread that opened the connection
+        offline_db = sqlite3.connect(str(db_file), check_same_thread=False)
         offline_db.row_factory = sqlite3.Row
     except Exception as e:
         return {"error": f"Failed to connect to database: {e}"}
@@ -52,8 +57,7 @@ async def upload_emails_from_db_async(conn: asyncpg.Connection, db_path: str = N
         
         # Fetch emails
         print(f"Fetching emails from {emails_table}...")
-        cursor = offline_db.execute(f"SELECT * FROM {emails_table}")
-        rows = cursor.fetchall()
+        rows = await run_blocking(lambda: offline_db.execute(f"SELECT * FROM {emails_table}").fetchall())
         
         if not rows:
             return {"error": "No emails found in database"}
@@ -159,7 +163,11 @@ async def upload_emails_from_db_async(conn: asyncpg.Connection, db_path: str = N
                 print(f"  Inserted {inserted}/{len(rows)} emails...")
             except Exception as e:
                 print(f"  Error inserting batch: {e}")
-                continue
+                if job:
+                    job.item_error(f"Batch at row {i}: {e}")
+            
+            if job:
+                job.progress(min(i + batch_size, len(rows)), len(rows), phase="inserting")
         
         return {
             "success": True,
@@ -1,4 +1,5 @@
 -- EpsteinBase Database Schema
+-- Later schema changes live in migrations/ and are applied on API startup
 -- CREATE EXTENSION IF NOT EXISTS vector; -- Optional: uncomment if using pgvector image
 
 CREATE TABLE documents (
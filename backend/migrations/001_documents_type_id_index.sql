@@ -0,0 +1,2 @@
+-- Keyset pagination walks documents by id DESC, optionally within one type
+CREATE INDEX IF NOT EXISTS idx_docs_type_id ON documents(type, id DESC);
@@ -0,0 +1,9 @@
+-- Single-row counter bumped whenever documents are ingested or rewritten.
+-- API processes compare against it to invalidate cached counts and results.
+CREATE TABLE IF NOT EXISTS data_version (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+INSERT INTO data_version (id) VALUES (true) ON CONFLICT DO NOTHING;
@@ -0,0 +1,28 @@
+-- Persisted, weighted full-text vector: title A, description/context B, ocr_text C.
+-- Existing rows are filled in batches by the search_vector backfill (app/backfills.py)
+-- that the API starts after migrations; until it finishes, search also matches rows
+-- without a vector on the old expression.
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION documents_search_vector(title TEXT, description TEXT, context TEXT, ocr_text TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+           setweight(to_tsvector('english', COALESCE(description, '') || ' ' || COALESCE(context, '')), 'B') ||
+           setweight(to_tsvector('english', COALESCE(ocr_text, '')), 'C')
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION documents_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := documents_search_vector(NEW.title, NEW.description, NEW.context, NEW.ocr_text);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documents_search_vector ON documents;
+CREATE TRIGGER trg_documents_search_vector
+    BEFORE INSERT OR UPDATE OF title, description, context, ocr_text ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_search_vector_update();
+
+CREATE INDEX IF NOT EXISTS idx_docs_search_vector ON documents USING gin(search_vector);
+
+-- idx_docs_ocr serves the fallback match and is dropped when the backfill completes
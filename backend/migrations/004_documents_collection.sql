@@ -0,0 +1,31 @@
+-- Flight logs / contact book pages are images whose file_path mentions "flight" or "contact".
+-- Computed once per write (mirrors app/categories.py) so tab filters are plain equality.
+-- A plain column kept by a trigger rather than a stored generated column, which would
+-- rewrite the whole table under an exclusive lock; existing rows are filled in batches
+-- by the collection backfill (app/backfills.py), and filters fall back to
+-- documents_collection() for rows it hasn't reached yet.
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS collection VARCHAR(20);
+
+CREATE OR REPLACE FUNCTION documents_collection(type TEXT, file_path TEXT)
+RETURNS VARCHAR(20) AS $$
+    SELECT CASE
+        WHEN type = 'image'
+             AND (LOWER(file_path) LIKE '%flight%' OR LOWER(file_path) LIKE '%contact%')
+        THEN 'flightlogs'
+        ELSE 'general'
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION documents_collection_update() RETURNS trigger AS $$
+BEGIN
+    NEW.collection := documents_collection(NEW.type, NEW.file_path);
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_documents_collection ON documents;
+CREATE TRIGGER trg_documents_collection
+    BEFORE INSERT OR UPDATE OF type, file_path ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_collection_update();
+
+CREATE INDEX IF NOT EXISTS idx_docs_type_collection_id ON documents(type, collection, id DESC);
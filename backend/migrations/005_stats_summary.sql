@@ -0,0 +1,30 @@
+-- Everything /api/stats reports, from one GROUPING SETS pass over documents.
+-- Refreshed by app/stats_summary.py whenever the data version is bumped.
+-- GROUPING(type, source, collection): 7 = (), 3 = (type), 5 = (source), 6 = (collection)
+CREATE MATERIALIZED VIEW IF NOT EXISTS stats_summary AS
+SELECT
+    CASE GROUPING(type, source, collection)
+        WHEN 7 THEN 'total'
+        WHEN 3 THEN 'type'
+        WHEN 5 THEN 'source'
+        WHEN 6 THEN 'collection'
+    END AS dimension,
+    COALESCE(type, source, collection, '') AS key,
+    CASE GROUPING(type, source, collection)
+        -- Per-type counts leave out flight logs, which have their own tab
+        WHEN 3 THEN COUNT(*) FILTER (WHERE collection = 'general')
+        ELSE COUNT(*)
+    END AS count
+FROM (
+    -- Rows the collection backfill hasn't reached yet are classified on the fly
+    SELECT type, source, COALESCE(collection, documents_collection(type, file_path)) AS collection
+    FROM documents
+) documents
+GROUP BY GROUPING SETS ((), (type), (source), (collection))
+HAVING NOT (
+    GROUPING(type, source, collection) = 3
+    AND (type IS NULL OR COUNT(*) FILTER (WHERE collection = 'general') = 0)
+);
+
+-- Required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_stats_summary_key ON stats_summary(dimension, key);
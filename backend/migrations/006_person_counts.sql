@@ -0,0 +1,21 @@
+-- Per-person document counts from metadata.detected_people, by document type.
+-- Backs /api/people when the people/document_people tables are empty;
+-- refreshed by app/people.py whenever the data version is bumped.
+CREATE INDEX IF NOT EXISTS idx_docs_detected_people ON documents USING gin((metadata->'detected_people'));
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS person_counts AS
+SELECT person AS name, COALESCE(d.type, '') AS type, COUNT(DISTINCT d.id) AS doc_count
+FROM documents d
+CROSS JOIN LATERAL jsonb_array_elements_text(
+    CASE WHEN jsonb_typeof(d.metadata->'detected_people') = 'array'
+         THEN d.metadata->'detected_people'
+         ELSE '[]'::jsonb
+    END
+) AS person
+WHERE d.metadata ? 'detected_people'
+AND person <> ''
+GROUP BY person, COALESCE(d.type, '');
+
+-- Required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS idx_person_counts_key ON person_counts(name, type);
+CREATE INDEX IF NOT EXISTS idx_person_counts_type_count ON person_counts(type, doc_count DESC);
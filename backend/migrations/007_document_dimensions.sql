@@ -0,0 +1,84 @@
+-- Document types and sources as lookup tables with smallint keys on documents.
+-- Filters resolve tab names / partial source names to ids in memory
+-- (app/dimensions.py) and hit compact (key, id DESC) indexes with equality.
+-- documents.type / documents.source stay the columns writers set; a trigger
+-- keeps type_id / source_id in step and registers new values. Existing rows are
+-- filled in batches by the dimensions backfill (app/backfills.py); until it
+-- finishes, filters keep using the text columns and their indexes.
+CREATE TABLE IF NOT EXISTS document_types (
+    id SMALLSERIAL PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS sources (
+    id SMALLSERIAL PRIMARY KEY,
+    name VARCHAR(50) NOT NULL UNIQUE
+);
+
+-- Extra names that resolve to a type or source (frontend tab ids, old spellings)
+CREATE TABLE IF NOT EXISTS dimension_aliases (
+    dimension VARCHAR(10) NOT NULL CHECK (dimension IN ('type', 'source')),
+    alias VARCHAR(100) NOT NULL,
+    target_id SMALLINT NOT NULL,
+    PRIMARY KEY (dimension, alias)
+);
+
+INSERT INTO document_types (name)
+SELECT name FROM (VALUES ('video'), ('audio'), ('image'), ('email'), ('document')) AS seed(name)
+UNION
+SELECT DISTINCT type FROM documents WHERE type IS NOT NULL
+ON CONFLICT (name) DO NOTHING;
+
+INSERT INTO sources (name)
+SELECT DISTINCT source FROM documents WHERE source IS NOT NULL
+ON CONFLICT (name) DO NOTHING;
+
+-- Tab ids the frontend sends (formerly TYPE_MAP in app/filters.py)
+INSERT INTO dimension_aliases (dimension, alias, target_id)
+SELECT 'type', a.alias, t.id
+FROM (VALUES ('videos', 'video'), ('images', 'image'), ('photo', 'image'),
+             ('emails', 'email'), ('documents', 'document')) AS a(alias, name)
+JOIN document_types t ON t.name = a.name
+ON CONFLICT (dimension, alias) DO NOTHING;
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS type_id SMALLINT REFERENCES document_types(id);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS source_id SMALLINT REFERENCES sources(id);
+
+CREATE OR REPLACE FUNCTION documents_set_dimensions() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.type_id := NULL;
+    IF NEW.type IS NOT NULL THEN
+        SELECT id INTO NEW.type_id FROM document_types WHERE name = NEW.type;
+        IF NEW.type_id IS NULL THEN
+            INSERT INTO document_types (name) VALUES (NEW.type)
+            ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+            RETURNING id INTO NEW.type_id;
+        END IF;
+    END IF;
+
+    NEW.source_id := NULL;
+    IF NEW.source IS NOT NULL THEN
+        SELECT id INTO NEW.source_id FROM sources WHERE name = NEW.source;
+        IF NEW.source_id IS NULL THEN
+            INSERT INTO sources (name) VALUES (NEW.source)
+            ON CONFLICT (name) DO UPDATE SET name = EXCLUDED.name
+            RETURNING id INTO NEW.source_id;
+        END IF;
+    END IF;
+
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS trg_documents_set_dimensions ON documents;
+CREATE TRIGGER trg_documents_set_dimensions
+    BEFORE INSERT OR UPDATE OF type, source ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_set_dimensions();
+
+CREATE INDEX IF NOT EXISTS idx_docs_type_key_id ON documents(type_id, id DESC);
+CREATE INDEX IF NOT EXISTS idx_docs_type_key_collection_id ON documents(type_id, collection, id DESC);
+CREATE INDEX IF NOT EXISTS idx_docs_source_key_id ON documents(source_id, id DESC);
+
+-- idx_docs_type, idx_docs_source, idx_docs_type_id and idx_docs_type_collection_id
+-- serve the text predicates meanwhile; the backfill drops them when it completes
@@ -0,0 +1,6 @@
+-- Date filters are half-open ranges (see app/filters.py), so plain btrees on the
+-- date columns apply. Within a type tab the range is read from (type_id, date, id)
+-- and date-bounded counts are index-only scans.
+CREATE INDEX IF NOT EXISTS idx_docs_type_key_released_id ON documents(type_id, date_released, id DESC);
+CREATE INDEX IF NOT EXISTS idx_docs_type_key_original_id ON documents(type_id, date_original, id DESC);
+CREATE INDEX IF NOT EXISTS idx_docs_date_original ON documents(date_original);
@@ -3,8 +3,13 @@
 import os
 import asyncpg
 import asyncio
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.migrations import apply_migrations
+
 # Get DATABASE_URL from environment (should be set by Render)
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
@@ -39,6 +44,9 @@ async def init_schema():
         
         print("✓ Schema initialized successfully!")
         
+        applied = await apply_migrations(conn)
+        print(f"✓ Applied {len(applied)} migration(s)")
+        
         # Verify tables were created
         tables = await conn.fetch("""
             SELECT table_name 
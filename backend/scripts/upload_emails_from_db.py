@@ -9,6 +9,11 @@ import json
 from pathlib import Path
 from datetime import datetime
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.data_version import mark_documents_changed
+
 # Database paths - can be set via command line argument, env var, or default
 OFFLINE_DB_PATH = None
 if len(sys.argv) > 1:
@@ -191,6 +196,8 @@ async def upload_emails_from_sqlite():
         print(f"  Inserted: {inserted}")
         print(f"  Skipped: {skipped}")
         
+        await mark_documents_changed(conn)
+        
     finally:
         await conn.close()
         offline_db.close()
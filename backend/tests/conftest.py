@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Make `app` importable however pytest is invoked
+sys.path.insert(0, str(Path(__file__).parent.parent))
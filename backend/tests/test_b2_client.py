@@ -0,0 +1,89 @@
+"""Bucket listing against a local stand-in for the S3 API"""
+import asyncio
+import time
+import pytest
+from app import b2_client
+
+PAGE_LATENCY = 0.05
+PAGES = 5
+# Well under one page round trip: a blocking call on the loop would show up as >= PAGE_LATENCY
+MAX_LOOP_LAG = 0.03
+
+
+class SlowS3:
+    """list_objects_v2 stand-in that sleeps like a network round trip"""
+    
+    def __init__(self, pages: int, fail_on_page: int = None):
+        self.pages = pages
+        self.fail_on_page = fail_on_page
+        self.calls = 0
+    
+    def list_objects_v2(self, Bucket, Prefix, MaxKeys, ContinuationToken=None):
+        page = int(ContinuationToken or 0)
+        self.calls += 1
+        time.sleep(PAGE_LATENCY)
+        if page == self.fail_on_page:
+            raise RuntimeError(f"page {page} failed")
+        keys = [{"Key": f"{Prefix}{page}/{i}.png"} for i in range(MaxKeys)]
+        truncated = page + 1 < self.pages
+        response = {"Contents": keys, "IsTruncated": truncated}
+        if truncated:
+            response["NextContinuationToken"] = str(page + 1)
+        return response
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    def install(client):
+        monkeypatch.setattr(b2_client, "_storage_client", client)
+        monkeypatch.setattr(b2_client, "BUCKET_NAME", "test-bucket")
+        return client
+    yield install
+    b2_client.shutdown_storage_executor()
+
+
+async def _max_loop_lag(work) -> tuple:
+    """Run `work` while a ticker measures how late the event loop wakes it up"""
+    lag = 0.0
+    done = asyncio.Event()
+    
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - started - 0.005)
+    
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)  # let the ticker start its first sleep
+    try:
+        result = await work
+    finally:
+        done.set()
+        await task
+    return result, lag
+
+
+def test_list_files_async_keeps_event_loop_responsive(storage):
+    client = storage(SlowS3(PAGES))
+    files, lag = asyncio.run(_max_loop_lag(b2_client.list_files_async(prefix="extracted/")))
+    
+    assert len(files) == PAGES * 1000
+    assert client.calls == PAGES
+    assert lag < MAX_LOOP_LAG
+
+
+def test_list_files_async_respects_max_keys(storage):
+    storage(SlowS3(PAGES))
+    files = asyncio.run(b2_client.list_files_async(max_keys=1500))
+    
+    assert len(files) == 1500
+
+
+def test_list_files_raises_instead_of_truncating(storage):
+    storage(SlowS3(PAGES, fail_on_page=1))
+    
+    with pytest.raises(RuntimeError):
+        b2_client.list_files()
+    with pytest.raises(RuntimeError):
+        asyncio.run(b2_client.list_files_async())